@@ -1,5 +1,9 @@
 """Authentication system for the application"""
 
+import asyncio
+import atexit
+import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from fastapi import Depends, HTTPException, status
@@ -7,14 +11,30 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr, field_validator
 import sqlite3
 import os
+import threading
+import time
+from cachetools import TTLCache
+from config import get_settings
+from sqlite_pool import SQLitePool
 from security import (
     verify_password, get_password_hash, create_access_token, 
     create_refresh_token, decode_token, hash_token
 )
 
+logger = logging.getLogger(__name__)
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Verified tokens -> user details, keyed by token hash. The TTL is kept far
+# below the access token lifetime so a revocation made by another worker is
+# picked up within seconds.
+_auth_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+# Token hashes already confirmed as not revoked. Revocation stays
+# authoritative in the sessions table; this only skips the repeat lookup.
+_revoked_neg: TTLCache = TTLCache(maxsize=50000, ttl=120)
+_auth_cache_lock = threading.Lock()
+
 # Pydantic models
 class UserCreate(BaseModel):
     username: str
@@ -55,22 +75,78 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 # Database functions
+# INSERT ... RETURNING needs SQLite 3.35+
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+# Large statement cache so every hot query below stays prepared per connection;
+# opened on first use against the configured database
+_db_pool: Optional[SQLitePool] = None
+_db_pool_lock = threading.Lock()
+
+# SQL for the hot paths, kept as constants so the exact same text is passed
+# each time and sqlite3's per-connection statement cache gets hits
+_USER_EXISTS_SQL = """
+    SELECT id FROM users WHERE username = ?
+    UNION ALL
+    SELECT id FROM users WHERE email = ?
+    LIMIT 1
+"""
+_INSERT_USER_RETURNING_SQL = """
+    INSERT INTO users (username, email, hashed_password, is_admin)
+    VALUES (?, ?, ?, ?)
+    RETURNING id, username, email, is_active, is_admin, created_at
+"""
+_INSERT_USER_SQL = "INSERT INTO users (username, email, hashed_password, is_admin) VALUES (?, ?, ?, ?)"
+_USER_BY_ID_SQL = "SELECT id, username, email, is_active, is_admin, created_at FROM users WHERE id = ?"
+_AUTH_USER_BY_USERNAME_SQL = """
+    SELECT id, username, email, hashed_password, is_active, is_admin, created_at
+    FROM users WHERE username = ?
+"""
+_AUTH_USER_BY_EMAIL_SQL = """
+    SELECT id, username, email, hashed_password, is_active, is_admin, created_at
+    FROM users WHERE email = ?
+"""
+_CURRENT_USER_SQL = """
+    SELECT id, username, email, is_active, is_admin, created_at, 0
+    FROM users WHERE username = ?
+"""
+_CURRENT_USER_WITH_SESSION_SQL = """
+    SELECT u.id, u.username, u.email, u.is_active, u.is_admin, u.created_at, s.is_revoked
+    FROM users u
+    LEFT JOIN sessions s ON s.token_hash = ?
+    WHERE u.username = ?
+"""
+_USER_ID_BY_USERNAME_SQL = "SELECT id FROM users WHERE username = ?"
+# Identical tokens issued within the same second hash the same; one row is
+# enough, and a duplicate must not fail the rest of a batched write
+_INSERT_SESSION_SQL = "INSERT OR IGNORE INTO sessions (user_id, token_hash, expires_at) VALUES (?, ?, ?)"
+_REVOKE_SESSION_SQL = "UPDATE sessions SET is_revoked = TRUE WHERE token_hash = ?"
+_DELETE_EXPIRED_SESSIONS_SQL = "DELETE FROM sessions WHERE expires_at < ?"
+
+def _get_db_pool() -> SQLitePool:
+    """Get the connection pool for the configured database"""
+    global _db_pool
+    database_path = get_settings().database_path
+    with _db_pool_lock:
+        if _db_pool is None or _db_pool.database != database_path:
+            if _db_pool is not None:
+                _db_pool.close_all()
+            _db_pool = SQLitePool(database_path, cached_statements=256)
+        return _db_pool
+
+@contextmanager
 def get_db_connection():
-    """Get database connection"""
-    db_path = os.path.join(os.path.dirname(__file__), "data", "project_insight.db")
-    return sqlite3.connect(db_path)
+    """Borrow a pooled database connection"""
+    with _get_db_pool().connection() as conn:
+        yield conn
 
-def create_user(user_data: UserCreate) -> UserResponse:
-    """Create a new user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
+def create_user(user_data: UserCreate, is_admin: bool = False) -> UserResponse:
+    """Create a new user, optionally with admin rights"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
         # Check if user already exists
-        cursor.execute(
-            "SELECT id FROM users WHERE username = ? OR email = ?",
-            (user_data.username, user_data.email)
-        )
+        # Two indexed equality probes instead of an OR across columns
+        cursor.execute(_USER_EXISTS_SQL, (user_data.username, user_data.email))
         if cursor.fetchone():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -79,21 +155,23 @@ def create_user(user_data: UserCreate) -> UserResponse:
         
         # Create user
         hashed_password = get_password_hash(user_data.password)
-        cursor.execute(
-            """INSERT INTO users (username, email, hashed_password) 
-               VALUES (?, ?, ?)""",
-            (user_data.username, user_data.email, hashed_password)
-        )
-        conn.commit()
-        user_id = cursor.lastrowid
-        
-        # Fetch created user
-        cursor.execute(
-            """SELECT id, username, email, is_active, is_admin, created_at 
-               FROM users WHERE id = ?""",
-            (user_id,)
-        )
-        user = cursor.fetchone()
+        if _SQLITE_HAS_RETURNING:
+            cursor.execute(
+                _INSERT_USER_RETURNING_SQL,
+                (user_data.username, user_data.email, hashed_password, is_admin)
+            )
+            user = cursor.fetchone()
+            conn.commit()
+        else:
+            cursor.execute(
+                _INSERT_USER_SQL,
+                (user_data.username, user_data.email, hashed_password, is_admin)
+            )
+            conn.commit()
+            
+            # Fetch created user
+            cursor.execute(_USER_BY_ID_SQL, (cursor.lastrowid,))
+            user = cursor.fetchone()
         
         return UserResponse(
             id=user[0],
@@ -103,20 +181,16 @@ def create_user(user_data: UserCreate) -> UserResponse:
             is_admin=bool(user[4]),
             created_at=datetime.fromisoformat(user[5])
         )
-    finally:
-        conn.close()
 
 def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
     """Authenticate a user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute(
-            """SELECT id, username, email, hashed_password, is_active, is_admin, created_at 
-               FROM users WHERE username = ? OR email = ?""",
-            (username, username)  # Allow login with email or username
-        )
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Allow login with email or username. Usernames are alphanumeric, so
+        # an '@' means an email and only that column's index is probed.
+        lookup_sql = _AUTH_USER_BY_EMAIL_SQL if "@" in username else _AUTH_USER_BY_USERNAME_SQL
+        cursor.execute(lookup_sql, (username,))
         user = cursor.fetchone()
         
         if not user:
@@ -136,8 +210,6 @@ def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
             "is_admin": bool(user[5]),
             "created_at": user[6]
         }
-    finally:
-        conn.close()
 
 def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
     """Get current user from JWT token"""
@@ -147,6 +219,12 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    token_hash = hash_token(token)
+    with _auth_cache_lock:
+        cached = _auth_cache.get(token_hash)
+    if cached is not None and cached["exp"] > time.time():
+        return dict(cached["user"])
+    
     payload = decode_token(token)
     if payload is None:
         raise credentials_exception
@@ -155,33 +233,29 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
     if username is None:
         raise credentials_exception
     
-    # Check if token is revoked
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        token_hash = hash_token(token)
-        cursor.execute(
-            "SELECT is_revoked FROM sessions WHERE token_hash = ?",
-            (token_hash,)
-        )
-        session = cursor.fetchone()
+    # Fetch the user and the token's revocation flag in one round trip
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
         
-        if session and session[0]:  # is_revoked
+        with _auth_cache_lock:
+            known_not_revoked = token_hash in _revoked_neg
+        if known_not_revoked:
+            cursor.execute(_CURRENT_USER_SQL, (username,))
+        else:
+            cursor.execute(_CURRENT_USER_WITH_SESSION_SQL, (token_hash, username))
+        user = cursor.fetchone()
+        
+        if not user or user[6]:  # is_revoked
             raise credentials_exception
         
-        # Get user details
-        cursor.execute(
-            """SELECT id, username, email, is_active, is_admin, created_at 
-               FROM users WHERE username = ?""",
-            (username,)
-        )
-        user = cursor.fetchone()
+        if not known_not_revoked:
+            with _auth_cache_lock:
+                _revoked_neg[token_hash] = True
         
-        if not user or not user[3]:  # is_active
+        if not user[3]:  # is_active
             raise credentials_exception
         
-        return {
+        current_user = {
             "id": user[0],
             "username": user[1],
             "email": user[2],
@@ -189,8 +263,9 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
             "is_admin": bool(user[4]),
             "created_at": user[5]
         }
-    finally:
-        conn.close()
+        with _auth_cache_lock:
+            _auth_cache[token_hash] = {"user": current_user, "exp": payload.get("exp", 0)}
+        return dict(current_user)
 
 def get_current_active_user(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
     """Ensure user is active"""
@@ -207,57 +282,108 @@ def get_admin_user(current_user: Dict[str, Any] = Depends(get_current_active_use
         )
     return current_user
 
-def create_user_session(user_id: int, access_token: str) -> None:
-    """Create a session record for token tracking"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+class _SessionWriter:
+    """Background writer that batches session inserts into a single commit
     
-    try:
-        token_hash = hash_token(access_token)
-        expires_at = datetime.utcnow() + timedelta(minutes=30)
-        
-        cursor.execute(
-            """INSERT INTO sessions (user_id, token_hash, expires_at) 
-               VALUES (?, ?, ?)""",
-            (user_id, token_hash, expires_at)
-        )
-        conn.commit()
-    finally:
-        conn.close()
+    Logins only queue their session row; a daemon thread writes whatever has
+    accumulated after a short window, and also prunes expired sessions
+    periodically. A thread is used rather than an asyncio task because the
+    callers are the synchronous helpers, which already run in worker threads.
+    """
+    
+    BATCH_SIZE = 50
+    FLUSH_DELAY = 0.02
+    CLEANUP_INTERVAL = 300
+    
+    def __init__(self):
+        self._pending = []
+        self._cond = threading.Condition()
+        # Held for each batch write so flush() waits for one in flight
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._next_cleanup = time.monotonic() + self.CLEANUP_INTERVAL
+    
+    def submit(self, row: tuple) -> None:
+        """Queue a (user_id, token_hash, expires_at) row"""
+        with self._cond:
+            self._pending.append(row)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+    
+    def flush(self) -> None:
+        """Write everything queued so far before returning"""
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            self._write(batch)
+    
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending, timeout=self.CLEANUP_INTERVAL)
+                # Give concurrent logins a moment to join this batch
+                deadline = time.monotonic() + self.FLUSH_DELAY
+                while self._pending and len(self._pending) < self.BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            
+            try:
+                self.flush()
+                if time.monotonic() >= self._next_cleanup:
+                    self._next_cleanup = time.monotonic() + self.CLEANUP_INTERVAL
+                    cleanup_expired_sessions()
+            except Exception as e:
+                logger.error(f"Session writer failed: {e}")
+    
+    def _write(self, batch: list) -> None:
+        if not batch:
+            return
+        with get_db_connection() as conn:
+            conn.executemany(_INSERT_SESSION_SQL, batch)
+            conn.commit()
+
+_session_writer = _SessionWriter()
+atexit.register(_session_writer.flush)
+
+def create_user_session(user_id: int, access_token: str) -> None:
+    """Queue a session record for token tracking"""
+    token_hash = hash_token(access_token)
+    expires_at = datetime.utcnow() + timedelta(minutes=30)
+    _session_writer.submit((user_id, token_hash, expires_at))
 
 def revoke_token(token: str) -> None:
     """Revoke a token"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
+    # The session row may still be queued; it must exist before it can be revoked
+    _session_writer.flush()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
         token_hash = hash_token(token)
-        cursor.execute(
-            "UPDATE sessions SET is_revoked = TRUE WHERE token_hash = ?",
-            (token_hash,)
-        )
+        cursor.execute(_REVOKE_SESSION_SQL, (token_hash,))
         conn.commit()
-    finally:
-        conn.close()
+    
+    with _auth_cache_lock:
+        _auth_cache.pop(token_hash, None)
+        _revoked_neg.pop(token_hash, None)
 
 def cleanup_expired_sessions() -> None:
     """Clean up expired sessions"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute(
-            "DELETE FROM sessions WHERE expires_at < ?",
-            (datetime.utcnow(),)
-        )
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(_DELETE_EXPIRED_SESSIONS_SQL, (datetime.utcnow(),))
         conn.commit()
-    finally:
-        conn.close()
 
 # API route handlers
+# The database and password hashing helpers above are blocking, so the async
+# handlers run them in a worker thread to keep the event loop responsive.
 async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
     """Login endpoint"""
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await asyncio.to_thread(authenticate_user, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -269,7 +395,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
     refresh_token = create_refresh_token(data={"sub": user["username"]})
     
     # Create session
-    create_user_session(user["id"], access_token)
+    await asyncio.to_thread(create_user_session, user["id"], access_token)
     
     return Token(
         access_token=access_token,
@@ -278,13 +404,22 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Token:
 
 async def register(user_data: UserCreate) -> UserResponse:
     """Register a new user"""
-    return create_user(user_data)
+    return await asyncio.to_thread(create_user, user_data)
 
 async def logout(token: str = Depends(oauth2_scheme)) -> Dict[str, str]:
     """Logout endpoint"""
-    revoke_token(token)
+    await asyncio.to_thread(revoke_token, token)
     return {"message": "Successfully logged out"}
 
+def _create_session_for_username(username: str, access_token: str) -> None:
+    """Record a session for the user with the given username, if it exists"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_USER_ID_BY_USERNAME_SQL, (username,))
+        user = cursor.fetchone()
+    if user:
+        create_user_session(user[0], access_token)
+
 async def refresh(refresh_token: str) -> Token:
     """Refresh access token"""
     payload = decode_token(refresh_token)
@@ -298,15 +433,7 @@ async def refresh(refresh_token: str) -> Token:
     access_token = create_access_token(data={"sub": username})
     
     # Get user ID for session
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        user = cursor.fetchone()
-        if user:
-            create_user_session(user[0], access_token)
-    finally:
-        conn.close()
+    await asyncio.to_thread(_create_session_for_username, username, access_token)
     
     return Token(
         access_token=access_token,
@@ -1,35 +1,97 @@
 """
 Browser-based YouTube transcript fetcher using Selenium
 """
+import io
 import logging
+import os
 import time
 import re
 import json
 import asyncio
 from typing import Optional, List
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import httpx
 
 from models import VideoTranscript, TranscriptSegment
 
 logger = logging.getLogger(__name__)
 
+# Player response is located with str.find and decoded in place
+_YTIPR_MARKER = 'ytInitialPlayerResponse'
+_YTIPR_SEPARATORS = frozenset(' \t\r\n"\']=:')
+_JSON_DECODER = json.JSONDecoder()
+
+# Evaluated in the page so only the objects we need cross the WebDriver bridge
+_PLAYER_RESPONSE_JS = "return window.ytInitialPlayerResponse || null;"
+
+# Present once the video player is usable
+PLAYER_SELECTOR = "#movie_player, ytd-player"
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Rough resident memory of one headless Chrome instance on a watch page
+DRIVER_MEMORY_BYTES = 400 * 1024 * 1024
+MAX_POOL_SIZE = 8
+
+# Back-off between attempts to start Chrome after it failed to launch
+DRIVER_RETRY_BASE_SECONDS = 30.0
+DRIVER_RETRY_MAX_SECONDS = 600.0
+
+def _default_pool_size() -> int:
+    """Size the driver pool by CPU count and physical memory"""
+    size = min(os.cpu_count() or 1, MAX_POOL_SIZE)
+    try:
+        total_memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        size = min(size, total_memory // DRIVER_MEMORY_BYTES)
+    except (AttributeError, ValueError, OSError):
+        pass  # sysconf isn't available on every platform
+    return max(1, size)
+
+# Compiled once at import; used for caption payloads when lxml isn't installed
+_TEXT_SEG_RE = re.compile(r'<text start="([^"]+)"[^>]*>([^<]+)</text>', re.DOTALL)
+
 class BrowserTranscriptFetcher:
-    """Fetch transcripts using real browser automation with Selenium"""
+    """Fetch transcripts using real browser automation with Selenium
     
-    def __init__(self):
+    Selenium is imported and Chrome started only on the first fetch, so
+    processes that never fall back to the browser don't pay for either.
+    If Chrome won't start, fetches return None straight away and another
+    start is attempted after a back-off that doubles with each failure.
+    """
+    
+    def __init__(self, pool_size: Optional[int] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.pool_size = pool_size or _default_pool_size()
         self.driver = None
-        self._setup_driver()
+        self._drivers: List = []
+        self._driver_count = 0  # live drivers, idle or checked out
+        self._creating = 0  # drivers still starting up in a worker thread
+        self._idle: List = []
+        self._start_failures = 0
+        self._retry_at = 0.0  # time.monotonic() before which no start is attempted
+        self._pool_changed = asyncio.Condition()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._cookies: Optional[dict] = None
     
-    def _setup_driver(self):
-        """Setup Chrome driver with optimized options"""
+    def _create_driver(self):
+        """Create a Chrome driver with optimized options"""
         try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+            from webdriver_manager.chrome import ChromeDriverManager
+            
             chrome_options = Options()
             
             # Browser arguments for stealth and performance
@@ -38,49 +100,148 @@ class BrowserTranscriptFetcher:
             chrome_options.add_argument('--disable-blink-features=AutomationControlled')
             chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
             chrome_options.add_experimental_option('useAutomationExtension', False)
+            chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+            chrome_options.add_argument('--disable-gpu')
+            chrome_options.add_argument('--disable-software-rasterizer')
+            chrome_options.add_argument('--disable-extensions')
+            chrome_options.add_argument('--disable-features=Translate,MediaRouter')
             
-            # Disable images and CSS for faster loading
+            # Block everything the transcript paths don't need. JavaScript stays on:
+            # the player, the transcript panel and ytInitialPlayerResponse all need it
             prefs = {
                 "profile.managed_default_content_settings.images": 2,
-                "profile.managed_default_content_settings.stylesheets": 2
+                "profile.managed_default_content_settings.stylesheets": 2,
+                "profile.managed_default_content_settings.fonts": 2,
+                "profile.managed_default_content_settings.plugins": 2,
+                "profile.managed_default_content_settings.popups": 2,
+                "profile.managed_default_content_settings.geolocation": 2,
+                "profile.managed_default_content_settings.notifications": 2,
+                "profile.managed_default_content_settings.media_stream": 2
             }
             chrome_options.add_experimental_option("prefs", prefs)
             
             # User agent to look like real browser
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36')
+            chrome_options.add_argument(f'--user-agent={USER_AGENT}')
             
             # Install and setup ChromeDriver automatically
             service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver = webdriver.Chrome(service=service, options=chrome_options)
             
             # Execute script to remove webdriver property
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             
             logger.info("Browser driver initialized successfully")
+            return driver
             
         except Exception as e:
             logger.error(f"Failed to setup Chrome driver: {e}")
-            self.driver = None
+            return None
+    
+    async def _acquire_driver(self):
+        """Take an idle driver, starting another one while the pool has room
+        
+        Returns None while Chrome is backing off after a failed start and no
+        driver is live or starting, so callers queued behind a failed start
+        don't wait forever.
+        """
+        async with self._pool_changed:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                backing_off = not self._driver_count and time.monotonic() < self._retry_at
+                if backing_off and not self._creating:
+                    return None
+                if not backing_off and self._driver_count + self._creating < self.pool_size:
+                    self._creating += 1
+                    break
+                await self._pool_changed.wait()
+        
+        driver = None
+        try:
+            driver = await asyncio.to_thread(self._create_driver)
+        finally:
+            async with self._pool_changed:
+                self._creating -= 1
+                if driver:
+                    self._start_failures = 0
+                    self._driver_count += 1
+                    self._drivers.append(driver)
+                    if self.driver is None:
+                        self.driver = driver
+                elif not self._driver_count and time.monotonic() >= self._retry_at:
+                    # Chrome couldn't start at all; don't retry the install on every video
+                    delay = min(DRIVER_RETRY_BASE_SECONDS * 2 ** min(self._start_failures, 10),
+                                DRIVER_RETRY_MAX_SECONDS)
+                    self._start_failures += 1
+                    self._retry_at = time.monotonic() + delay
+                    logger.warning(f"Browser automation unavailable, retrying Chrome in {delay:.0f}s")
+                # Wake waiters either way: a failed start frees a slot
+                self._pool_changed.notify_all()
+        return driver
+    
+    async def _release_driver(self, driver):
+        """Hand a driver back to the pool and wake one waiter"""
+        async with self._pool_changed:
+            self._idle.append(driver)
+            self._pool_changed.notify()
+    
+    async def _refresh_cookies(self, driver) -> dict:
+        """Copy the browser's YouTube cookies (consent, visitor id) into the cache"""
+        cookies = await asyncio.to_thread(driver.get_cookies)
+        self._cookies = {cookie['name']: cookie['value'] for cookie in cookies}
+        if self._http_client is not None:
+            self._http_client.cookies.clear()
+            self._http_client.cookies.update(self._cookies)
+        return self._cookies
+    
+    async def _get_http_client(self, driver) -> httpx.AsyncClient:
+        """Get the shared HTTP client, seeding it with the cached cookies on first use"""
+        if self._http_client is None:
+            if self._cookies is None:
+                await self._refresh_cookies(driver)
+            self._http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                headers={'User-Agent': USER_AGENT},
+                cookies=self._cookies,
+                timeout=10.0,
+                follow_redirects=True
+            )
+        return self._http_client
     
     async def fetch_transcript(self, video_id: str) -> Optional[VideoTranscript]:
         """Fetch transcript using browser automation"""
-        if not self.driver:
+        if not self.enabled:
+            return None
+        
+        driver = await self._acquire_driver()
+        if not driver:
             logger.error("Browser driver not available")
             return None
             
         try:
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            from selenium.common.exceptions import TimeoutException, NoSuchElementException
+            
             logger.info(f"Fetching transcript for {video_id} using browser automation")
             
             # Load the video page
             video_url = f"https://www.youtube.com/watch?v={video_id}"
-            self.driver.get(video_url)
+            await asyncio.to_thread(driver.get, video_url)
             
-            # Wait for page to load
-            await asyncio.sleep(3)
+            # Wait until the player exists rather than for a fixed time
+            try:
+                await asyncio.to_thread(
+                    WebDriverWait(driver, 8).until,
+                    EC.presence_of_element_located((By.CSS_SELECTOR, PLAYER_SELECTOR))
+                )
+            except TimeoutException:
+                logger.debug(f"Player for {video_id} did not appear, checking page anyway")
             
             # Check if video is available
             try:
-                error_element = self.driver.find_element(By.CSS_SELECTOR, "[class*='error-message']")
+                error_element = driver.find_element(By.CSS_SELECTOR, "[class*='error-message']")
                 if error_element:
                     logger.debug(f"Video {video_id} appears to be unavailable")
                     return None
@@ -88,13 +249,13 @@ class BrowserTranscriptFetcher:
                 pass  # Good, no error message found
             
             # Look for transcript button/menu
-            transcript = await self._extract_transcript_from_page(video_id)
+            transcript = await self._extract_transcript_from_page(driver, video_id)
             if transcript:
                 logger.info(f"Successfully extracted transcript using browser: {len(transcript.segments)} segments")
                 return transcript
             
             # Alternative: Extract from page source
-            transcript = await self._extract_transcript_from_source(video_id)
+            transcript = await self._extract_transcript_from_source(driver, video_id)
             if transcript:
                 logger.info(f"Successfully extracted transcript from page source: {len(transcript.segments)} segments")
                 return transcript
@@ -105,36 +266,44 @@ class BrowserTranscriptFetcher:
         except Exception as e:
             logger.error(f"Error in browser transcript fetching for {video_id}: {type(e).__name__}: {e}")
             return None
+        finally:
+            await self._release_driver(driver)
     
-    async def _extract_transcript_from_page(self, video_id: str) -> Optional[VideoTranscript]:
+    async def fetch_many(self, video_ids: List[str]) -> List[Optional[VideoTranscript]]:
+        """Fetch several transcripts concurrently, one per pooled driver"""
+        return await asyncio.gather(*(self.fetch_transcript(video_id) for video_id in video_ids))
+    
+    async def _extract_transcript_from_page(self, driver, video_id: str) -> Optional[VideoTranscript]:
         """Try to extract transcript by interacting with YouTube's transcript UI"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        
         try:
             # Look for the three-dot menu button
-            wait = WebDriverWait(self.driver, 10)
+            wait = WebDriverWait(driver, 10)
             
             # Wait for video player to load
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#movie_player")))
+            await asyncio.to_thread(wait.until, EC.presence_of_element_located((By.CSS_SELECTOR, "#movie_player")))
             
             # Try to find the more actions menu (three dots)
             try:
-                more_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, 
+                more_button = await asyncio.to_thread(wait.until, EC.element_to_be_clickable((By.CSS_SELECTOR, 
                     "button[aria-label*='More actions'], button[aria-label*='More'], .ytp-button[aria-label*='More']")))
                 more_button.click()
-                await asyncio.sleep(1)
                 
-                # Look for transcript option in the menu
-                transcript_button = self.driver.find_element(By.XPATH, 
-                    "//div[contains(text(), 'Show transcript') or contains(text(), 'Transcript')]")
+                # Wait for the transcript option to show up in the menu
+                transcript_button = await asyncio.to_thread(wait.until, EC.element_to_be_clickable((By.XPATH, 
+                    "//div[contains(text(), 'Show transcript') or contains(text(), 'Transcript')]")))
                 transcript_button.click()
-                await asyncio.sleep(2)
                 
-                # Extract transcript segments from the transcript panel
-                transcript_elements = self.driver.find_elements(By.CSS_SELECTOR, 
-                    ".ytd-transcript-segment-renderer, .transcript-segment")
+                # Wait for the transcript panel to render its segments
+                transcript_elements = await asyncio.to_thread(wait.until, EC.presence_of_all_elements_located((By.CSS_SELECTOR, 
+                    ".ytd-transcript-segment-renderer, .transcript-segment")))
                 
                 if transcript_elements:
                     segments = []
-                    full_text_parts = []
+                    full_text = io.StringIO()
                     
                     for element in transcript_elements:
                         try:
@@ -157,19 +326,19 @@ class BrowserTranscriptFetcher:
                                     text=text
                                 )
                                 segments.append(segment)
-                                full_text_parts.append(text)
+                                full_text.write(text)
+                                full_text.write(' ')
                                 
                         except Exception as e:
                             logger.debug(f"Error extracting transcript segment: {e}")
                             continue
                     
                     if segments:
-                        full_text = ' '.join(full_text_parts)
                         return VideoTranscript(
                             video_id=video_id,
                             language='en',  # Assume English for UI-extracted transcripts
                             segments=segments,
-                            full_text=full_text
+                            full_text=full_text.getvalue()[:-1]
                         )
                         
             except Exception as e:
@@ -180,13 +349,15 @@ class BrowserTranscriptFetcher:
             
         return None
     
-    async def _extract_transcript_from_source(self, video_id: str) -> Optional[VideoTranscript]:
+    async def _extract_transcript_from_source(self, driver, video_id: str) -> Optional[VideoTranscript]:
         """Extract transcript from page source (similar to SimpleTranscriptFetcher but with real browser)"""
         try:
-            page_source = self.driver.page_source
-            
-            # Extract player response from page source
-            player_response = self._extract_player_response(page_source)
+            # Read the player response straight from the page's JS context, only
+            # serializing the whole DOM when that global isn't there
+            player_response = await asyncio.to_thread(driver.execute_script, _PLAYER_RESPONSE_JS)
+            if not isinstance(player_response, dict):
+                page_source = await asyncio.to_thread(lambda: driver.page_source)
+                player_response = self._extract_player_response(page_source)
             if not player_response:
                 return None
             
@@ -195,7 +366,9 @@ class BrowserTranscriptFetcher:
             if not caption_tracks:
                 return None
             
-            # Try to fetch captions using the browser's session
+            # Caption tracks are plain XML over HTTP, so fetch them directly
+            # with the browser's cookies instead of driving the browser
+            client = await self._get_http_client(driver)
             for track in caption_tracks:
                 try:
                     lang_code = track.get('languageCode', '')
@@ -204,12 +377,14 @@ class BrowserTranscriptFetcher:
                     if not base_url:
                         continue
                     
-                    # Use browser to fetch the caption URL
-                    self.driver.get(base_url)
-                    await asyncio.sleep(1)
-                    
-                    # Get the page source which should contain the caption data
-                    caption_data = self.driver.page_source
+                    response = await client.get(base_url)
+                    if response.status_code == 403:
+                        # Cached cookies went stale; take fresh ones from the browser once
+                        await self._refresh_cookies(driver)
+                        response = await client.get(base_url)
+                    if response.status_code != 200:
+                        continue
+                    caption_data = response.text
                     
                     if caption_data and len(caption_data) > 100:  # Ensure we got actual content
                         transcript = self._parse_caption_data(caption_data, video_id, lang_code)
@@ -244,20 +419,20 @@ class BrowserTranscriptFetcher:
     def _extract_player_response(self, page_source: str) -> Optional[dict]:
         """Extract player response from page source (same logic as SimpleTranscriptFetcher)"""
         try:
-            patterns = [
-                r'var ytInitialPlayerResponse = ({.+?});',
-                r'window\["ytInitialPlayerResponse"\] = ({.+?});',
-                r'ytInitialPlayerResponse":\s*({.+?})(?:,|\})',
-                r'ytInitialPlayerResponse\s*=\s*({.+?});'
-            ]
-
-            for pattern in patterns:
-                match = re.search(pattern, page_source, re.DOTALL)
-                if match:
+            # Find the assignment literally and let the JSON decoder consume exactly
+            # one object from there; no regex backtracking over the whole page
+            idx = page_source.find(_YTIPR_MARKER)
+            while idx != -1:
+                pos = idx + len(_YTIPR_MARKER)
+                while pos < len(page_source) and page_source[pos] in _YTIPR_SEPARATORS:
+                    pos += 1
+                if page_source.startswith('{', pos):
                     try:
-                        return json.loads(match.group(1))
+                        player_response, _ = _JSON_DECODER.raw_decode(page_source, pos)
+                        return player_response
                     except json.JSONDecodeError:
-                        continue
+                        pass
+                idx = page_source.find(_YTIPR_MARKER, pos)
         except Exception as e:
             logger.debug(f"Error extracting player response: {e}")
         return None
@@ -280,13 +455,9 @@ class BrowserTranscriptFetcher:
             # Look for XML-style captions
             if '<transcript>' in caption_data or '<text start=' in caption_data:
                 segments = []
-                full_text_parts = []
-                
-                # Simple regex to extract caption segments
-                pattern = r'<text start="([^"]+)"[^>]*>([^<]+)</text>'
-                matches = re.findall(pattern, caption_data, re.DOTALL)
+                full_text = io.StringIO()
                 
-                for start_time_str, text in matches:
+                for start_time_str, text in self._iter_caption_entries(caption_data):
                     try:
                         start_time = float(start_time_str)
                         clean_text = text.strip()
@@ -298,33 +469,57 @@ class BrowserTranscriptFetcher:
                                 text=clean_text
                             )
                             segments.append(segment)
-                            full_text_parts.append(clean_text)
+                            full_text.write(clean_text)
+                            full_text.write(' ')
                     except:
                         continue
                 
                 if segments:
-                    full_text = ' '.join(full_text_parts)
                     return VideoTranscript(
                         video_id=video_id,
                         language=language,
                         segments=segments,
-                        full_text=full_text
+                        full_text=full_text.getvalue()[:-1]
                     )
         except Exception as e:
             logger.debug(f"Error parsing caption data: {e}")
         
         return None
     
+    def _iter_caption_entries(self, caption_data: str):
+        """Yield (start, text) pairs for each <text> element in caption XML"""
+        if not LXML_AVAILABLE:
+            yield from _TEXT_SEG_RE.findall(caption_data)
+            return
+        
+        # Stream the elements and free each one once read
+        source = io.BytesIO(caption_data.encode('utf-8'))
+        for _, elem in etree.iterparse(source, tag='text', recover=True):
+            yield elem.get('start'), elem.text or ''
+            elem.clear()
+    
     def cleanup(self):
         """Clean up browser resources"""
-        if self.driver:
+        if self._http_client is not None:
+            client, self._http_client = self._http_client, None
             try:
-                self.driver.quit()
+                asyncio.get_running_loop().create_task(client.aclose())
+            except RuntimeError:
+                pass  # No loop running; the connections close with the client
+        
+        drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
                 logger.info("Browser driver cleaned up")
             except Exception as e:
                 logger.error(f"Error cleaning up browser driver: {e}")
-            finally:
-                self.driver = None
+        
+        self.driver = None
+        self._driver_count = 0
+        self._creating = 0
+        self._idle = []
+        self._pool_changed = asyncio.Condition()
     
     def __del__(self):
         """Ensure cleanup on object destruction"""
@@ -3,10 +3,15 @@
 import json
 import logging
 import time
-from typing import Any, Optional, Union, Callable
-from functools import wraps
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple, Union, Callable
+from functools import lru_cache, wraps
 from datetime import datetime, timedelta
 import hashlib
+import heapq
+import queue
+import threading
+from concurrent.futures import Future
 
 try:
     import redis
@@ -14,119 +19,575 @@ try:
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
     
 logger = logging.getLogger(__name__)
 
+# Values are stored in Redis as MessagePack when msgspec is installed, JSON otherwise
+if MSGSPEC_AVAILABLE:
+    _ENCODER = msgspec.msgpack.Encoder()
+    _DECODER = msgspec.msgpack.Decoder()
+
+def _json_dumps(value: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+    return json.dumps(value, sort_keys=sort_keys).encode()
+
+def _json_loads(raw: Union[bytes, str]) -> Any:
+    """Parse JSON, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _hash_key(data: bytes) -> str:
+    """Hash key material into a 32 character hex digest"""
+    if BLAKE3_AVAILABLE:
+        return blake3(data).hexdigest(length=16)
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def _encode(value: Any) -> bytes:
+    """Encode a value as MessagePack or JSON"""
+    if MSGSPEC_AVAILABLE:
+        return _ENCODER.encode(value)
+    return _json_dumps(value)
+
+def _decode(raw: bytes) -> Any:
+    """Decode a MessagePack or JSON payload"""
+    if MSGSPEC_AVAILABLE:
+        try:
+            return _DECODER.decode(raw)
+        except msgspec.DecodeError:
+            pass  # Written as JSON before the switch to MessagePack
+    return _json_loads(raw)
+
+class _StructCodec:
+    """Typed MessagePack codec for dict payloads with a fixed set of keys
+    
+    Dicts with exactly the struct's fields are validated and encoded as a
+    msgspec.Struct; decoding then goes through a schema-specific decoder
+    instead of building a generic map. Anything else uses the generic path.
+    """
+    
+    def __init__(self, struct_type: type):
+        self.struct_type = struct_type
+        self.fields = struct_type.__struct_fields__
+        self._field_set = frozenset(self.fields)
+        self._decoder = msgspec.msgpack.Decoder(struct_type)
+    
+    def encode(self, value: Any) -> Optional[bytes]:
+        """Encode value, or return None if it doesn't fit the schema"""
+        if not isinstance(value, dict) or value.keys() != self._field_set:
+            return None
+        try:
+            payload = msgspec.convert([value[field] for field in self.fields], self.struct_type)
+        except msgspec.ValidationError:
+            return None
+        return _ENCODER.encode(payload)
+    
+    def decode(self, raw: bytes) -> dict:
+        """Decode a payload written by encode back into a dict"""
+        return msgspec.structs.asdict(self._decoder.decode(raw))
+
+if MSGSPEC_AVAILABLE:
+    class VideoPayload(msgspec.Struct, array_like=True, gc=False):
+        """Cached video metadata, one field per videos table column"""
+        video_id: str
+        title: str
+        description: Optional[str]
+        channel_id: str
+        channel_title: str
+        published_at: str
+        duration: Optional[str]
+        thumbnail_url: Optional[str]
+        view_count: Optional[int]
+        like_count: Optional[int]
+        has_transcript: Union[bool, int, None]
+        transcript_language: Optional[str]
+        topic_id: Optional[int]
+        created_at: Optional[str]
+        updated_at: Optional[str]
+    
+    _VIDEO_CODEC: Optional[_StructCodec] = _StructCodec(VideoPayload)
+else:
+    _VIDEO_CODEC = None
+
+# Redis values carry a one-byte frame marker: bit 0 means the payload is
+# zstd-compressed (anything above the threshold, e.g. transcripts and API
+# responses), bit 1 means it was written by a typed codec
+_RAW_FRAME = 0x00
+_ZSTD_FRAME = 0x01
+_TYPED_FRAME = 0x02
+COMPRESS_THRESHOLD = 1024
+_FRAME_ERRORS: Tuple[type, ...] = (ValueError,)
+if ZSTD_AVAILABLE:
+    _COMPRESSOR = zstandard.ZstdCompressor(level=3)
+    _DECOMPRESSOR = zstandard.ZstdDecompressor()
+    _FRAME_ERRORS += (zstandard.ZstdError,)
+
+def _serialize(value: Any, codec: Optional[_StructCodec] = None) -> bytes:
+    """Encode a value for storage in Redis"""
+    frame = _RAW_FRAME
+    payload = codec.encode(value) if codec is not None else None
+    if payload is not None:
+        frame |= _TYPED_FRAME
+    else:
+        payload = _encode(value)
+    
+    if ZSTD_AVAILABLE and len(payload) > COMPRESS_THRESHOLD:
+        frame |= _ZSTD_FRAME
+        payload = _COMPRESSOR.compress(payload)
+    return bytes((frame,)) + payload
+
+def _deserialize(raw: bytes, codec: Optional[_StructCodec] = None) -> Any:
+    """Decode a value read from Redis"""
+    frame = raw[0] if raw else -1
+    if frame & _TYPED_FRAME and 0 <= frame <= 0x03:
+        if codec is None:
+            raise ValueError("Typed cache payload read without its codec")
+        payload = raw[1:]
+        if frame & _ZSTD_FRAME:
+            payload = _DECOMPRESSOR.decompress(payload)
+        return codec.decode(payload)
+    
+    try:
+        if frame == _ZSTD_FRAME and ZSTD_AVAILABLE:
+            return _decode(_DECOMPRESSOR.decompress(raw[1:]))
+        if frame == _RAW_FRAME:
+            return _decode(raw[1:])
+    except _FRAME_ERRORS:
+        pass  # An unframed value that happens to start with a marker byte
+    return _decode(raw)  # Written before values were framed
+
+# Returned by get() on a miss when passed as the default, so a cached None
+# can be told apart from a missing key without a second lookup
+_MISS = object()
+
+_GLOB_CHARS = frozenset("*?[]\\")
+
+# Keys fetched per SCAN step and removed per UNLINK in clear_pattern
+SCAN_BATCH_SIZE = 500
+
 class InMemoryCache:
-    """Simple in-memory cache as fallback when Redis is not available"""
+    """Simple in-memory cache as fallback when Redis is not available
+    
+    Entries are kept in least-recently-used order and the oldest are evicted
+    once max_size is exceeded, so memory stays bounded. Expiry times also go
+    on a heap so expired entries are swept even if they are never read again.
+    Keys are indexed by namespace (``prefix:name``) so a namespace can be
+    cleared without scanning the whole cache. These structures are updated
+    together, so the public methods hold a lock: the cache-writer thread
+    writes here while request threads read.
+    """
     
-    def __init__(self):
-        self.cache = {}
+    # Sweep the expiry heap once every this many operations
+    SWEEP_EVERY = 64
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.cache = OrderedDict()
         self.expiry = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._ops = 0
+        self._by_ns: Dict[str, set] = defaultdict(set)
+        self._lock = threading.RLock()
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
-        if key in self.cache:
-            if key in self.expiry and time.time() > self.expiry[key]:
-                del self.cache[key]
-                del self.expiry[key]
-                return None
-            return self.cache[key]
-        return None
+    @staticmethod
+    def _namespace(key: str) -> Optional[str]:
+        """Namespace of a key: everything before its second colon"""
+        first = key.find(":")
+        if first == -1:
+            return None
+        second = key.find(":", first + 1)
+        if second == -1:
+            return None
+        return key[:second]
+    
+    def _remove(self, key: str) -> None:
+        """Drop a present key along with its expiry and namespace entry"""
+        del self.cache[key]
+        self.expiry.pop(key, None)
+        ns = self._namespace(key)
+        if ns is not None:
+            members = self._by_ns.get(ns)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._by_ns[ns]
+    
+    def _maybe_sweep(self) -> None:
+        """Run the expiry sweep every SWEEP_EVERY calls"""
+        self._ops += 1
+        if self._ops >= self.SWEEP_EVERY:
+            self._ops = 0
+            self._sweep(time.time())
+    
+    def _sweep(self, now: float) -> None:
+        """Remove every entry whose expiry time has passed"""
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            # Skip heap entries left behind by an overwrite or delete
+            if self.expiry.get(key) == expires_at:
+                self._remove(key)
+        
+        # Overwrites leave stale heap entries behind; rebuild if they pile up
+        if len(heap) > 2 * max(len(self.expiry), self.max_size):
+            self._heap = [(expires_at, key) for key, expires_at in self.expiry.items()]
+            heapq.heapify(self._heap)
+    
+    def get(self, key: str, default: Any = None) -> Optional[Any]:
+        """Get value from cache, or default if missing"""
+        with self._lock:
+            self._maybe_sweep()
+            if key in self.cache:
+                if key in self.expiry and time.time() > self.expiry[key]:
+                    self._remove(key)
+                    return default
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            return default
     
     def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
         """Set value in cache with optional expiration (seconds)"""
-        self.cache[key] = value
-        if expire:
-            self.expiry[key] = time.time() + expire
-        return True
+        with self._lock:
+            self._maybe_sweep()
+            if key not in self.cache:
+                ns = self._namespace(key)
+                if ns is not None:
+                    self._by_ns[ns].add(key)
+            self.cache[key] = value
+            self.cache.move_to_end(key)
+            if expire:
+                expires_at = time.time() + expire
+                self.expiry[key] = expires_at
+                heapq.heappush(self._heap, (expires_at, key))
+            else:
+                self.expiry.pop(key, None)
+            
+            while len(self.cache) > self.max_size:
+                self._remove(next(iter(self.cache)))
+            return True
     
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
-        if key in self.cache:
-            del self.cache[key]
-            if key in self.expiry:
-                del self.expiry[key]
-            return True
-        return False
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+                return True
+            return False
+    
+    def clear_namespace(self, ns: str) -> int:
+        """Delete every key in a namespace, returning how many were removed"""
+        with self._lock:
+            keys = self._by_ns.pop(ns, ())
+            for key in keys:
+                del self.cache[key]
+                self.expiry.pop(key, None)
+            return len(keys)
+    
+    def keys(self) -> List[str]:
+        """Snapshot of the keys currently held"""
+        with self._lock:
+            return list(self.cache)
     
     def exists(self, key: str) -> bool:
         """Check if key exists"""
-        return self.get(key) is not None
+        return self.get(key, _MISS) is not _MISS
     
     def clear(self) -> None:
         """Clear all cache"""
-        self.cache.clear()
-        self.expiry.clear()
+        with self._lock:
+            self.cache.clear()
+            self.expiry.clear()
+            self._heap.clear()
+            self._by_ns.clear()
     
     def ping(self) -> bool:
         """Check if cache is available"""
         return True
 
 class CacheManager:
-    """Cache manager with Redis and in-memory fallback"""
+    """Cache manager with Redis and in-memory fallback
+    
+    Raw Redis payloads are also kept in a small process-local L1 for a couple
+    of seconds, and concurrent misses on the same key share one GET. Writes
+    are queued and sent by a background thread in pipelines unless the caller
+    asks for a synchronous set.
+    """
     
-    def __init__(self, redis_url: Optional[str] = None, prefix: str = "ytai"):
+    L1_TTL = 2.0
+    L1_MAX_SIZE = 1024
+    # Most queued writes sent to Redis in one pipeline
+    WRITE_BATCH_SIZE = 100
+    
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        prefix: str = "ytai",
+        max_connections: int = 100
+    ):
         self.prefix = prefix
+        # Built once; _make_key runs at the top of every cache operation
+        self._prefix_str = prefix + ":"
         self.redis_client = None
+        self._pool = None
         self.in_memory = InMemoryCache()
+        # full key -> (expires at, raw payload); payloads are decoded per read
+        # so callers never share a mutable result
+        self._l1: OrderedDict = OrderedDict()
+        self._l1_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
         
         if REDIS_AVAILABLE and redis_url:
             try:
-                self.redis_client = redis.from_url(
-                    redis_url,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5
-                )
+                # One bounded pool of kept-alive connections shared by every call
+                pool_kwargs = {
+                    "max_connections": max_connections,
+                    "socket_connect_timeout": 5,
+                    "socket_timeout": 5,
+                    "health_check_interval": 30,
+                    # Skip the CLIENT SETINFO round trips on every new connection
+                    "lib_name": None,
+                    "lib_version": None
+                }
+                if not redis_url.startswith("unix://"):
+                    pool_kwargs["socket_keepalive"] = True  # TCP only
+                self._pool = redis.ConnectionPool.from_url(redis_url, **pool_kwargs)
+                self.redis_client = redis.Redis(connection_pool=self._pool)
                 # Test connection
                 self.redis_client.ping()
                 logger.info("Redis cache connected successfully")
+                self._writer = threading.Thread(target=self._write_loop, name="cache-writer", daemon=True)
+                self._writer.start()
             except (RedisError, Exception) as e:
                 logger.warning(f"Failed to connect to Redis: {e}. Using in-memory cache.")
+                if self._pool is not None:
+                    self._pool.disconnect()
+                self._pool = None
                 self.redis_client = None
     
     def _make_key(self, key: str) -> str:
         """Create namespaced cache key"""
-        return f"{self.prefix}:{key}"
+        return self._prefix_str + key
+    
+    def _l1_get(self, full_key: str) -> Optional[bytes]:
+        """Return the L1 payload for a key if it is still fresh"""
+        with self._l1_lock:
+            entry = self._l1.get(full_key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._l1[full_key]
+                return None
+            self._l1.move_to_end(full_key)
+            return entry[1]
+    
+    def _l1_put(self, full_key: str, raw: bytes) -> None:
+        """Remember a Redis payload for L1_TTL seconds"""
+        with self._l1_lock:
+            self._l1[full_key] = (time.monotonic() + self.L1_TTL, raw)
+            self._l1.move_to_end(full_key)
+            while len(self._l1) > self.L1_MAX_SIZE:
+                self._l1.popitem(last=False)
+    
+    def _l1_discard(self, *full_keys: str) -> None:
+        """Forget L1 payloads for the given keys, or all of them if none given"""
+        with self._l1_lock:
+            if not full_keys:
+                self._l1.clear()
+            for full_key in full_keys:
+                self._l1.pop(full_key, None)
+    
+    def _redis_get(self, full_key: str) -> Optional[bytes]:
+        """GET a raw payload, collapsing concurrent misses into one request"""
+        raw = self._l1_get(full_key)
+        if raw is not None:
+            return raw
+        
+        with self._l1_lock:
+            future = self._inflight.get(full_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[full_key] = Future()
+        if not leader:
+            return future.result()
+        
+        try:
+            raw = self.redis_client.get(full_key)
+            if raw is not None:
+                self._l1_put(full_key, raw)
+            future.set_result(raw)
+            return raw
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._l1_lock:
+                self._inflight.pop(full_key, None)
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
+    def _write_loop(self) -> None:
+        """Send queued writes to Redis, batching whatever has accumulated"""
+        while True:
+            batch = [self._write_q.get()]
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for full_key, serialized, expire, _ in batch:
+                    if expire:
+                        pipe.setex(full_key, expire, serialized)
+                    else:
+                        pipe.set(full_key, serialized)
+                pipe.execute()
+            except Exception as e:
+                # Anything escaping here would kill the writer and leave
+                # flush() waiting forever, so every failure is handled
+                logger.error(f"Redis set error, keeping {len(batch)} write(s) in memory: {e}")
+                try:
+                    for full_key, _, expire, value in batch:
+                        self._l1_discard(full_key)
+                        self.in_memory.set(full_key, value, expire)
+                except Exception as e:
+                    keys = ", ".join(full_key for full_key, *_ in batch[:5])
+                    logger.error(f"Dropped {len(batch)} queued cache write(s) ({keys}): {e}")
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+    
+    def flush(self) -> None:
+        """Wait until every queued write has been sent"""
+        if self._writer is not None:
+            self._write_q.join()
+    
+    def get(
+        self, 
+        key: str, 
+        default: Any = None,
+        codec: Optional[_StructCodec] = None
+    ) -> Optional[Any]:
+        """Get value from cache, or default if missing
+        
+        Pass _MISS as the default to distinguish a cached None from a miss,
+        and the codec the value was written with, if any.
+        """
         full_key = self._make_key(key)
         
         if self.redis_client:
             try:
-                value = self.redis_client.get(full_key)
-                if value:
-                    return json.loads(value)
-            except (RedisError, json.JSONDecodeError) as e:
+                value = self._redis_get(full_key)
+                if value is not None:
+                    return _deserialize(value, codec)
+            except (RedisError,) + _FRAME_ERRORS as e:
                 logger.error(f"Redis get error: {e}")
         
         # Fallback to in-memory
-        return self.in_memory.get(full_key)
+        return self.in_memory.get(full_key, default)
+    
+    def mget(
+        self, 
+        keys: List[str], 
+        default: Any = None,
+        codecs: Optional[List[Optional[_StructCodec]]] = None
+    ) -> List[Any]:
+        """Get several values in one round trip, in the order of keys
+        
+        codecs, if given, holds the codec for the key at the same position.
+        """
+        full_keys = [self._make_key(key) for key in keys]
+        codecs = codecs or [None] * len(keys)
+        values = [_MISS] * len(keys)
+        
+        if self.redis_client:
+            raws = [self._l1_get(full_key) for full_key in full_keys]
+            missing = [i for i, raw in enumerate(raws) if raw is None]
+            try:
+                if missing:
+                    fetched = self.redis_client.mget([full_keys[i] for i in missing])
+                    for i, raw in zip(missing, fetched):
+                        if raw is not None:
+                            self._l1_put(full_keys[i], raw)
+                            raws[i] = raw
+                for i, raw in enumerate(raws):
+                    if raw is not None:
+                        values[i] = _deserialize(raw, codecs[i])
+            except (RedisError,) + _FRAME_ERRORS as e:
+                logger.error(f"Redis mget error: {e}")
+        
+        # Fallback to in-memory for anything Redis didn't have
+        return [
+            self.in_memory.get(full_key, default) if value is _MISS else value
+            for full_key, value in zip(full_keys, values)
+        ]
     
     def set(
         self, 
         key: str, 
         value: Any, 
         expire: Optional[int] = None,
-        expire_at: Optional[datetime] = None
+        expire_at: Optional[datetime] = None,
+        sync: bool = False,
+        codec: Optional[_StructCodec] = None
     ) -> bool:
-        """Set value in cache with optional expiration"""
+        """Set value in cache with optional expiration
+        
+        With Redis the write is queued and True means it was accepted; pass
+        sync=True to wait for Redis to confirm it. A codec stores the value
+        in its typed encoding when it matches the codec's schema.
+        """
         full_key = self._make_key(key)
-        serialized = json.dumps(value)
+        serialized = _serialize(value, codec)
         
         if expire_at:
             expire = int((expire_at - datetime.utcnow()).total_seconds())
         
+        if self.redis_client and not sync:
+            # Reads in this process see the value right away through the L1
+            self._l1_put(full_key, serialized)
+            self._write_q.put((full_key, serialized, expire, value))
+            return True
+        
         if self.redis_client:
+            self.flush()
             try:
                 if expire:
-                    return bool(self.redis_client.setex(full_key, expire, serialized))
+                    stored = bool(self.redis_client.setex(full_key, expire, serialized))
                 else:
-                    return bool(self.redis_client.set(full_key, serialized))
+                    stored = bool(self.redis_client.set(full_key, serialized))
+                self._l1_put(full_key, serialized)
+                return stored
             except RedisError as e:
                 logger.error(f"Redis set error: {e}")
+                self._l1_discard(full_key)
         
         # Fallback to in-memory
         return self.in_memory.set(full_key, value, expire)
@@ -136,6 +597,8 @@ class CacheManager:
         full_key = self._make_key(key)
         
         if self.redis_client:
+            self.flush()
+            self._l1_discard(full_key)
             try:
                 return bool(self.redis_client.delete(full_key))
             except RedisError as e:
@@ -143,11 +606,28 @@ class CacheManager:
         
         return self.in_memory.delete(full_key)
     
+    def delete_many(self, keys: List[str]) -> int:
+        """Delete several keys in one round trip"""
+        full_keys = [self._make_key(key) for key in keys]
+        if not full_keys:
+            return 0
+        
+        if self.redis_client:
+            self.flush()
+            self._l1_discard(*full_keys)
+            try:
+                return self.redis_client.delete(*full_keys)
+            except RedisError as e:
+                logger.error(f"Redis delete error: {e}")
+        
+        return sum(self.in_memory.delete(full_key) for full_key in full_keys)
+    
     def exists(self, key: str) -> bool:
         """Check if key exists"""
         full_key = self._make_key(key)
         
         if self.redis_client:
+            self.flush()
             try:
                 return bool(self.redis_client.exists(full_key))
             except RedisError as e:
@@ -161,19 +641,34 @@ class CacheManager:
         count = 0
         
         if self.redis_client:
+            self.flush()
+            self._l1_discard()
             try:
-                keys = self.redis_client.keys(full_pattern)
-                if keys:
-                    count = self.redis_client.delete(*keys)
+                # SCAN walks the keyspace incrementally instead of blocking the
+                # server like KEYS, and UNLINK frees the values in the background
+                batch = []
+                for key in self.redis_client.scan_iter(match=full_pattern, count=SCAN_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= SCAN_BATCH_SIZE:
+                        count += self.redis_client.unlink(*batch)
+                        batch.clear()
+                if batch:
+                    count += self.redis_client.unlink(*batch)
             except RedisError as e:
                 logger.error(f"Redis clear pattern error: {e}")
         
+        # A whole-namespace pattern like "search:*" uses the namespace index
+        ns = full_pattern[:-2]
+        if (full_pattern.endswith(":*")
+                and self.in_memory._namespace(full_pattern) == ns
+                and not _GLOB_CHARS.intersection(ns)):
+            return count + self.in_memory.clear_namespace(ns)
+        
         # For in-memory, we need to manually match patterns
-        keys_to_delete = [k for k in self.in_memory.cache.keys() if k.startswith(self.prefix)]
+        keys_to_delete = [k for k in self.in_memory.keys() if k.startswith(self._prefix_str)]
         for key in keys_to_delete:
             if pattern == "*" or key.startswith(full_pattern.replace("*", "")):
-                self.in_memory.delete(key)
-                count += 1
+                count += self.in_memory.delete(key)
         
         return count
     
@@ -190,17 +685,28 @@ class CacheManager:
 _cache: Optional[CacheManager] = None
 
 def init_cache(redis_url: Optional[str] = "redis://localhost:6379/0") -> CacheManager:
-    """Initialize global cache instance"""
+    """Initialize global cache instance
+    
+    When REDIS_SOCKET_PATH is configured and no unix:// URL was given, Redis
+    is reached over that Unix domain socket instead of loopback TCP.
+    """
     global _cache
     if _cache is None:
+        from config import get_settings
+        socket_path = get_settings().redis_socket_path
+        if socket_path and redis_url and not redis_url.startswith("unix://"):
+            redis_url = f"unix://{socket_path}?db=0"
         _cache = CacheManager(redis_url)
     return _cache
 
+@lru_cache(maxsize=None)
 def get_cache() -> CacheManager:
-    """Get global cache instance"""
-    if _cache is None:
-        return init_cache()
-    return _cache
+    """Get global cache instance
+    
+    Memoized, since cache_result calls this on every decorated call; the
+    instance never changes once init_cache has created it.
+    """
+    return init_cache()
 
 # Cache decorators
 def cache_result(
@@ -217,22 +723,32 @@ def cache_result(
         key_func: Function to generate cache key from arguments
     """
     def decorator(func):
+        # Remember the key for each argument tuple so repeat calls skip the
+        # formatting and hashing; typed so that 1 and 1.0 keep separate keys
+        @lru_cache(maxsize=4096, typed=True)
+        def default_key(kwargs_items, *args):
+            key_parts = [str(arg).encode() for arg in args]
+            key_parts.extend([f"{k}={v}".encode() for k, v in kwargs_items])
+            key_hash = _hash_key(b"\x00".join(key_parts))
+            return f"{key_prefix}:{key_hash}"
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key
             if key_func:
                 cache_key = f"{key_prefix}:{key_func(*args, **kwargs)}"
             else:
-                # Default key generation
-                key_parts = [str(arg) for arg in args]
-                key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
-                key_hash = hashlib.md5("".join(key_parts).encode()).hexdigest()
-                cache_key = f"{key_prefix}:{key_hash}"
+                kwargs_items = tuple(sorted(kwargs.items()))
+                try:
+                    cache_key = default_key(kwargs_items, *args)
+                except TypeError:
+                    # Unhashable arguments can't be memoized
+                    cache_key = default_key.__wrapped__(kwargs_items, *args)
             
             # Try to get from cache
             cache = get_cache()
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
+            cached_value = cache.get(cache_key, _MISS)
+            if cached_value is not _MISS:
                 logger.debug(f"Cache hit for {cache_key}")
                 return cached_value
             
@@ -257,11 +773,19 @@ class VideoCache:
     
     def get_video(self, video_id: str) -> Optional[dict]:
         """Get video metadata from cache"""
-        return self.cache.get(f"video:{video_id}")
+        return self.cache.get(f"video:{video_id}", codec=_VIDEO_CODEC)
     
     def set_video(self, video_id: str, video_data: dict, expire: int = 3600) -> bool:
         """Cache video metadata"""
-        return self.cache.set(f"video:{video_id}", video_data, expire)
+        return self.cache.set(f"video:{video_id}", video_data, expire, codec=_VIDEO_CODEC)
+    
+    def get_video_bundle(self, video_id: str) -> Tuple[Optional[dict], Optional[str]]:
+        """Get video metadata and transcript from cache in one round trip"""
+        video, transcript = self.cache.mget(
+            [f"video:{video_id}", f"transcript:{video_id}"],
+            codecs=[_VIDEO_CODEC, None]
+        )
+        return video, transcript
     
     def get_transcript(self, video_id: str) -> Optional[str]:
         """Get video transcript from cache"""
@@ -273,18 +797,17 @@ class VideoCache:
     
     def get_search_results(self, query: str, limit: int) -> Optional[list]:
         """Get search results from cache"""
-        key = f"search:{hashlib.md5(f'{query}:{limit}'.encode()).hexdigest()}"
+        key = f"search:{_hash_key(f'{query}:{limit}'.encode())}"
         return self.cache.get(key)
     
     def set_search_results(self, query: str, limit: int, results: list, expire: int = 1800) -> bool:
         """Cache search results (30 minutes)"""
-        key = f"search:{hashlib.md5(f'{query}:{limit}'.encode()).hexdigest()}"
+        key = f"search:{_hash_key(f'{query}:{limit}'.encode())}"
         return self.cache.set(key, results, expire)
     
     def invalidate_video(self, video_id: str) -> None:
         """Invalidate all caches for a video"""
-        self.cache.delete(f"video:{video_id}")
-        self.cache.delete(f"transcript:{video_id}")
+        self.cache.delete_many([f"video:{video_id}", f"transcript:{video_id}"])
         # Also clear search results that might contain this video
         self.cache.clear_pattern("search:*")
     
@@ -292,6 +815,23 @@ class VideoCache:
         """Invalidate all search caches"""
         return self.cache.clear_pattern("search:*")
 
+@lru_cache(maxsize=2048)
+def _cached_api_key(endpoint: str, params_items: Tuple[Tuple[str, Any], ...]) -> str:
+    """Build the API cache key for canonicalized params"""
+    return _make_api_key(endpoint, dict(params_items))
+
+def _make_api_key(endpoint: str, params: dict) -> str:
+    """Hash endpoint params into an API cache key"""
+    return f"ytapi:{endpoint}:{_hash_key(_json_dumps(params, sort_keys=True))}"
+
+def _api_key(endpoint: str, params: dict) -> str:
+    """Get the API cache key, reusing it for params seen before"""
+    try:
+        return _cached_api_key(endpoint, tuple(sorted(params.items())))
+    except TypeError:
+        # Unhashable param values (e.g. lists) can't be memoized
+        return _make_api_key(endpoint, params)
+
 class APICache:
     """Cache operations for API responses"""
     
@@ -300,13 +840,11 @@ class APICache:
     
     def get_youtube_api_response(self, endpoint: str, params: dict) -> Optional[dict]:
         """Get YouTube API response from cache"""
-        key = f"ytapi:{endpoint}:{hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()}"
-        return self.cache.get(key)
+        return self.cache.get(_api_key(endpoint, params))
     
     def set_youtube_api_response(self, endpoint: str, params: dict, response: dict, expire: int = 3600) -> bool:
         """Cache YouTube API response"""
-        key = f"ytapi:{endpoint}:{hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()}"
-        return self.cache.set(key, response, expire)
+        return self.cache.set(_api_key(endpoint, params), response, expire)
     
     def get_gemini_response(self, prompt_hash: str) -> Optional[dict]:
         """Get Gemini API response from cache"""
@@ -1,25 +1,187 @@
+import asyncio
+import copy
 import logging
 import uuid
 import random
-from typing import List, Dict, Any
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
 from models import ConversationMessage, ChatResponse, VideoCitation, VideoRecommendation
-from gemini_service import GeminiService
+from gemini_service import GeminiService, RELEVANCE_FALLBACK_REASONS
 from youtube_service import YouTubeService
-from database import get_videos_by_query, get_all_videos
+from database import get_videos_by_query
+from config import get_settings
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Static parts of the conversational prompt, around the user's message
+_CONVERSATIONAL_PROMPT_HEADER = "\n".join([
+    "You are Project Insight, an AI assistant that helps users explore and understand "
+    "their personal YouTube video library.",
+    "",
+    "The user has sent you a message:"
+])
+
+# Instructions with strict constraints
+_CONVERSATIONAL_PROMPT_FOOTER = "\n".join([
+    "IMPORTANT: You are an AI assistant that helps users explore their PERSONAL YouTube video library.",
+    "You must ONLY reference videos that exist in the user's personal collection.",
+    "NEVER suggest, recommend, or mention videos that are not in their library.",
+    "NEVER hallucinate or make up video titles, content, or recommendations.",
+    "",
+    "Please respond in a friendly, helpful manner. Here's what you can help with:",
+    "- Answering general questions about the user's video library",
+    "- Helping find specific videos or topics IN THEIR LIBRARY",
+    "- Explaining concepts from the user's videos",
+    "- Suggesting ways to organize or explore their library",
+    "",
+    "If the user asks about videos on a topic, you should:",
+    "1. Acknowledge their question",
+    "2. Offer to search their personal library for relevant videos",
+    "3. NEVER suggest external videos or content not in their library",
+    "",
+    "Keep your response concise and focused.",
+    "",
+    "Your response:"
+])
+
+# Conversational replies used when Gemini fails
+_FALLBACK_RESPONSES = (
+    "I'm having trouble understanding that right now. Could you rephrase your question or ask me something else?",
+    "I'm not quite sure how to respond to that. I can help you find videos or answer questions about your library. What would you like to know?",
+    "I'm still learning! Could you try asking me in a different way? I'm best at helping you find and understand videos in your library."
+)
+
+# Intent -> fallback pool including a context-aware reply
+_INTENT_FALLBACK_RESPONSES = {
+    'greeting': _FALLBACK_RESPONSES + (
+        "Hello! I'm here to help you explore your YouTube video library. What would you like to do?",
+    ),
+    'capabilities': _FALLBACK_RESPONSES + (
+        "I can help you search through your YouTube video library, answer questions about your videos, and provide insights about your content. Just let me know what you're looking for!",
+    ),
+}
+
+# Synthesis transcript blocks and citations keyed by the ordered video ids
+# they were built from; short-lived so refreshed transcripts show up soon
+_transcript_context_cache: TTLCache = TTLCache(maxsize=256, ttl=300)
+
+# HH:MM:SS or MM:SS
+_TS_RE = re.compile(r'^(?:(\d+):)?(\d+):(\d+)$')
+
+@lru_cache(maxsize=1024)
+def _timestamp_to_seconds(timestamp: str) -> Optional[str]:
+    """Convert a citation timestamp to a seconds value for the URL
+    
+    Returns None for a malformed HH:MM:SS / MM:SS timestamp.
+    """
+    if ':' not in timestamp:
+        return timestamp  # Already in seconds
+    match = _TS_RE.match(timestamp)
+    if not match:
+        return None
+    h, m, s = match.groups(default='0')
+    return str(int(h) * 3600 + int(m) * 60 + int(s))
+
+def _truncate_at_sentence(text: str, limit: int) -> str:
+    """Cut text to at most limit characters, preferably at a sentence end"""
+    if len(text) <= limit:
+        return text
+    end = text.rfind('. ', 0, limit)
+    # Only back off to a sentence boundary if it keeps most of the excerpt
+    return text[:end + 1] if end >= limit // 2 else text[:limit]
+
 class ChatHandler:
     """Main chat handler that orchestrates AI responses"""
     
+    RELEVANCE_CACHE_SIZE = 512
+    RELEVANCE_CACHE_TTL = 3600  # seconds
+    INTENT_CACHE_SIZE = 256
+    INTENT_CACHE_TTL = 600  # seconds
+    
     def __init__(self, gemini_service: GeminiService, youtube_service: YouTubeService):
         self.gemini = gemini_service
         self.youtube = youtube_service
+        # Per-process caches of Gemini calls, holding the task for each call;
+        # they start empty after a restart
+        self._relevance_cache: TTLCache = TTLCache(
+            maxsize=self.RELEVANCE_CACHE_SIZE, ttl=self.RELEVANCE_CACHE_TTL
+        )
+        self._intent_cache: TTLCache = TTLCache(
+            maxsize=self.INTENT_CACHE_SIZE, ttl=self.INTENT_CACHE_TTL
+        )
     
-    async def process_message(
+    @staticmethod
+    def _shared_call(
+        cache: TTLCache,
+        key: tuple,
+        make_call: Callable[[], Awaitable[Any]],
+        is_fallback: Callable[[Any], bool] = lambda result: False
+    ) -> Awaitable[Any]:
+        """Await the cached call for key, starting it with make_call on a miss
+        
+        Concurrent requests for the same key share a single call. Failed calls
+        and results is_fallback flags are dropped from the cache once the call
+        finishes, so they get retried instead of served until they expire.
+        """
+        future = cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(make_call())
+            
+            def forget_unusable(f: asyncio.Future) -> None:
+                if cache.get(key) is not f:
+                    return
+                if f.cancelled() or f.exception() is not None or is_fallback(f.result()):
+                    del cache[key]
+            
+            future.add_done_callback(forget_unusable)
+            cache[key] = future
+        
+        # Shielded so one caller giving up doesn't cancel the shared call
+        return asyncio.shield(future)
+    
+    async def _get_relevance_reason(self, query: str, video: Dict[str, Any]) -> str:
+        """Get a relevance reason, reusing one generated for the same query and video"""
+        return await self._shared_call(
+            self._relevance_cache,
+            (query.strip().lower(), video['video_id']),
+            lambda: self.gemini.generate_video_relevance_reason(
+                query, 
+                video['title'], 
+                video.get('description', '')
+            ),
+            is_fallback=lambda reason: reason in RELEVANCE_FALLBACK_REASONS
+        )
+    
+    async def _analyze_intent(
         self, 
         message: str, 
         conversation_history: List[ConversationMessage] = None
+    ) -> Dict[str, Any]:
+        """Analyze query intent, reusing the result for a repeated message
+        
+        The key covers the last three history messages, which is all the
+        context the analysis sees.
+        """
+        recent = tuple((m.role, m.content) for m in (conversation_history or [])[-3:])
+        result = await self._shared_call(
+            self._intent_cache,
+            (message.strip().lower(), recent),
+            lambda: self.gemini.analyze_query_intent(
+                message, 
+                conversation_history=conversation_history
+            ),
+            is_fallback=lambda result: result.get('fallback', False)
+        )
+        # Callers get their own copy of the shared result
+        return copy.deepcopy(result)
+    
+    async def process_message(
+        self, 
+        message: str, 
+        conversation_history: List[ConversationMessage] = None,
+        conversation_id: Optional[str] = None
     ) -> ChatResponse:
         """
         Process user message and generate appropriate response
@@ -27,70 +189,159 @@ class ChatHandler:
         Args:
             message: The user's message
             conversation_history: List of previous conversation messages for context
+            conversation_id: ID for cost tracking; generated if not provided
             
         Returns:
             ChatResponse object with the generated response
         """
+        fields: Dict[str, Any] = {}
+        message_parts = []
+        async for event, payload in self.process_message_stream(
+            message, 
+            conversation_history, 
+            conversation_id
+        ):
+            if event == "meta":
+                fields = payload
+            elif event == "delta":
+                message_parts.append(payload)
+        return ChatResponse(message="".join(message_parts), **fields)
+    
+    async def process_message_stream(
+        self, 
+        message: str, 
+        conversation_history: List[ConversationMessage] = None,
+        conversation_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Process user message, yielding the response while it is generated
+        
+        Args:
+            message: The user's message
+            conversation_history: List of previous conversation messages for context
+            conversation_id: ID for cost tracking; generated if not provided
+            
+        Yields:
+            ("meta", fields) with the ChatResponse fields other than the
+            message, then ("delta", text) chunks of the message, then
+            ("end", {})
+        """
+        last_event = None
         try:
-            logger.info(f"Processing message: {message[:100]}...")
+            logger.info("Processing message: %.100s...", message)
+            
+            # Nothing to analyze; ask for a question instead of calling Gemini
+            if not message.strip():
+                async for event in self._response_events(ChatResponse(
+                    message="What would you like to know about your video library?",
+                    type="conversational"
+                )):
+                    last_event = event[0]
+                    yield event
+                return
             
             # Generate conversation ID for cost tracking if not provided
-            conversation_id = str(uuid.uuid4())
+            if conversation_id is None:
+                conversation_id = uuid.uuid4().hex
             
             # Analyze query intent and extract context
-            intent_analysis = await self.gemini.analyze_query_intent(
-                message, 
-                conversation_history=conversation_history
-            )
+            intent_analysis = await self._analyze_intent(message, conversation_history)
             
-            logger.info(f"Query analysis: {intent_analysis}")
+            logger.info("Query analysis: %r", intent_analysis)
             
             # Use the rewritten query if available, otherwise use original message
             effective_query = intent_analysis.get('query_rewrite', message).strip()
             if not effective_query:  # If rewrite is empty, fall back to original
                 effective_query = message
                 
+            # Use the most specific search term (longest) for better relevance;
+            # entities the query already contains can't be longer than it
+            entities = intent_analysis.get('entities', [])
+            query_lower = effective_query.lower()
+            search_term = effective_query
+            if not all(str(e).lower() in query_lower for e in entities):
+                search_term = max([effective_query, *entities], key=len)
+            
             # Prepare context for the handler
             context = {
                 'conversation_id': conversation_id,
                 'intent': intent_analysis['intent'],
-                'entities': intent_analysis.get('entities', []),
+                'entities': entities,
                 'requires_context': intent_analysis.get('requires_context', True),
                 'follow_up': intent_analysis.get('follow_up', False),
                 'original_query': message,
-                'effective_query': effective_query
+                'effective_query': effective_query,
+                'search_term': search_term
             }
             
             # Route to appropriate handler based on intent
             intent = intent_analysis['intent']
             if intent == "discovery":
-                return await self._handle_discovery_query(
+                events = self._response_events(await self._handle_discovery_query(
                     effective_query, 
                     conversation_history, 
                     conversation_id,
                     context
-                )
+                ))
             elif intent == "synthesis":
-                return await self._handle_synthesis_query(
+                events = self._stream_synthesis_query(
                     effective_query, 
                     conversation_history, 
                     conversation_id,
                     context
                 )
             else:  # conversational
-                return await self._handle_conversational_query(
+                events = self._stream_conversational_query(
                     effective_query, 
                     conversation_history, 
                     conversation_id,
                     context
                 )
+            
+            async for event in events:
+                last_event = event[0]
+                yield event
                 
         except Exception as e:
-            logger.error(f"Error processing message: {e}", exc_info=True)
-            return ChatResponse(
-                message="I apologize, but I encountered an error processing your request. Please try again.",
-                type="error"
-            )
+            logger.error("Error processing message: %s", e, exc_info=True)
+            if last_event is None:
+                async for event in self._response_events(ChatResponse(
+                    message="I apologize, but I encountered an error processing your request. Please try again.",
+                    type="error"
+                )):
+                    yield event
+            elif last_event != "end":
+                # Part of the message already went out; just close the stream
+                yield "end", {}
+    
+    @staticmethod
+    async def _response_events(response: ChatResponse) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield the stream events for an already complete response"""
+        yield "meta", {
+            "type": response.type,
+            "videos": response.videos,
+            "citations": response.citations
+        }
+        yield "delta", response.message
+        yield "end", {}
+    
+    @staticmethod
+    async def _strip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Strip leading and trailing whitespace from streamed text"""
+        pending = ""  # Whitespace held back until more text follows it
+        leading = True
+        async for chunk in chunks:
+            if leading:
+                chunk = chunk.lstrip()
+                if not chunk:
+                    continue
+                leading = False
+            text = pending + chunk
+            stripped = text.rstrip()
+            pending = text[len(stripped):]
+            if stripped:
+                yield stripped
+    
     
     async def _handle_discovery_query(
         self, 
@@ -111,15 +362,24 @@ class ChatHandler:
         Returns:
             ChatResponse with video recommendations
         """
-        logger.info(f"Handling discovery query: {query}")
+        logger.info("Handling discovery query: %s", query)
         
-        # Extract entities from context if available for better search
-        search_terms = [query]
-        if context and 'entities' in context and context['entities']:
-            search_terms.extend(context['entities'])
+        # Search with the most specific term, picked during intent analysis
+        if context and context.get('search_term'):
+            search_query = context['search_term']
+        else:
+            search_terms = [query]
+            if context and context.get('entities'):
+                search_terms.extend(context['entities'])
+            search_query = max(search_terms, key=len)
         
-        # Use the most specific search term (longest) for better relevance
-        search_query = max(search_terms, key=len) if search_terms else query
+        # Nothing to search for; skip the search and relevance reasons
+        if not search_query.strip():
+            return ChatResponse(
+                message="What would you like to search for?",
+                type="discovery",
+                context=context
+            )
         
         # Search for relevant videos
         relevant_videos = get_videos_by_query(search_query, limit=10)
@@ -130,18 +390,24 @@ class ChatHandler:
             relevant_videos = get_videos_by_query(context['original_query'], limit=10)
         
         # Convert to video recommendations with AI-generated relevance reasons
+        top_videos = relevant_videos[:5]  # Limit to 5 recommendations
+        
+        # Only generate relevance reasons if we have a non-empty query; the
+        # requests run concurrently so latency is that of the slowest one
+        relevance_reasons = [""] * len(top_videos)
+        if query.strip():
+            relevance_reasons = await asyncio.gather(*[
+                self._get_relevance_reason(query, video)
+                for video in top_videos
+            ], return_exceptions=True)
+        
         video_recommendations = []
-        for video in relevant_videos[:5]:  # Limit to 5 recommendations
-            try:
-                # Only generate relevance reason if we have a non-empty query
+        for video, relevance_reason in zip(top_videos, relevance_reasons):
+            if isinstance(relevance_reason, Exception):
+                logger.warning("Error generating relevance reason for video %s: %s", video.get('video_id', 'unknown'), relevance_reason)
                 relevance_reason = ""
-                if query.strip():
-                    relevance_reason = await self.gemini.generate_video_relevance_reason(
-                        query, 
-                        video['title'], 
-                        video.get('description', '')
-                    )
-                
+            
+            try:
                 recommendation = VideoRecommendation(
                     id=video['video_id'],
                     title=video['title'],
@@ -157,11 +423,10 @@ class ChatHandler:
                 video_recommendations.append(recommendation)
                 
             except Exception as e:
-                logger.warning(f"Error processing video {video.get('video_id', 'unknown')}: {e}", exc_info=True)
+                logger.warning("Error processing video %s: %s", video.get('video_id', 'unknown'), e, exc_info=True)
                 continue
         
-        # Sort by relevance score if available
-        video_recommendations.sort(key=lambda x: getattr(x, 'score', 0), reverse=True)
+        # Already in relevance order: get_videos_by_query returns ranked results
         
         # Generate conversational response
         if video_recommendations:
@@ -190,13 +455,13 @@ class ChatHandler:
             context=context  # Include context in the response for UI/UX purposes
         )
     
-    async def _handle_synthesis_query(
+    async def _stream_synthesis_query(
         self, 
         query: str, 
         conversation_history: List[ConversationMessage] = None,
         conversation_id: str = None,
         context: Dict[str, Any] = None
-    ) -> ChatResponse:
+    ) -> AsyncIterator[Tuple[str, Any]]:
         """
         Handle synthesis-focused queries (answering questions)
         
@@ -206,10 +471,10 @@ class ChatHandler:
             conversation_id: Unique ID for the conversation
             context: Additional context from intent analysis
             
-        Returns:
-            ChatResponse with synthesized answer and relevant citations
+        Yields:
+            Stream events of a synthesized answer with relevant citations
         """
-        logger.info(f"Handling synthesis query: {query}")
+        logger.info("Handling synthesis query: %s", query)
         
         # Use the effective query from context if available, otherwise use the original query
         effective_query = context.get('effective_query', query) if context else query
@@ -219,54 +484,39 @@ class ChatHandler:
         if context and context.get('follow_up') and context.get('original_query'):
             search_query = f"{context['original_query']} {effective_query}"
         
-        # Find potentially relevant videos
-        relevant_videos = get_videos_by_query(search_query, limit=5)
-        
-        # If no videos found, try with just the original query
-        if not relevant_videos and search_query != effective_query:
-            relevant_videos = get_videos_by_query(effective_query, limit=5)
-        
-        # If still no videos, try with just the original query from context
-        if not relevant_videos and context and context.get('original_query'):
-            relevant_videos = get_videos_by_query(context['original_query'], limit=5)
+        # Find potentially relevant videos, falling back to just the effective
+        # query and then the original query from context; each distinct query
+        # is searched at most once
+        fallback_queries = dict.fromkeys(filter(None, [
+            search_query,
+            effective_query,
+            context.get('original_query') if context else None
+        ]))
+        relevant_videos = []
+        for fallback_query in fallback_queries:
+            relevant_videos = get_videos_by_query(fallback_query, limit=5)
+            if relevant_videos:
+                break
         
-        # Collect transcripts from relevant videos with relevance scoring
-        transcript_context = ""
-        citations = []
-        processed_videos = set()  # Avoid duplicate videos
+        # Avoid duplicate videos, keeping rank order
+        unique_videos = list({video['video_id']: video for video in relevant_videos}.values())
         
-        for video in relevant_videos:
-            if video['video_id'] in processed_videos:
-                continue
-                
-            processed_videos.add(video['video_id'])
-            
-            # Get transcript with error handling
-            try:
-                transcript = self.youtube.get_transcript_from_file(video['video_id'])
-                if not transcript:
-                    logger.debug(f"No transcript found for video: {video['video_id']}")
-                    continue
-                    
-                # Add transcript context (truncated to manage token usage)
-                video_context = f"\n\n--- Video: {video['title']} (Relevance: {video.get('score', 0):.1f}) ---\n{transcript[:1500]}...\n"
-                transcript_context += video_context
-                
-                # Generate citations for this video
-                citations.append(VideoCitation(
-                    video_id=video['video_id'],
-                    title=video['title'],
-                    timestamp="00:00",  # Default timestamp
-                    relevance_score=video.get('score', 0)
-                ))
-                
-            except Exception as e:
-                logger.warning(f"Error processing video {video.get('video_id', 'unknown')}: {e}", exc_info=True)
-                continue
+        # Follow-up turns usually match the same videos; reuse the context
+        # built for them instead of re-reading and re-truncating transcripts.
+        # This only saves local work: every Gemini call is stateless, so the
+        # block is still sent, and billed, with each synthesis turn
+        cache_key = tuple(video['video_id'] for video in unique_videos)
+        cached = _transcript_context_cache.get(cache_key)
+        if cached is not None:
+            transcript_context, citations = cached[0], list(cached[1])
+        else:
+            transcript_context, citations = await self._collect_transcript_context(unique_videos)
+            if transcript_context:
+                _transcript_context_cache[cache_key] = (transcript_context, tuple(citations))
                 
         # If we have no transcript context, handle the no-results case
         if not transcript_context:
-            logger.warning(f"No relevant transcripts found for query: {query}")
+            logger.warning("No relevant transcripts found for query: %s", query)
             
             # Try to be helpful based on the context
             if context and context.get('entities'):
@@ -283,11 +533,13 @@ class ChatHandler:
             # This suggestion has been removed to keep the response focused on
             # the current query.
             
-            return ChatResponse(
+            async for event in self._response_events(ChatResponse(
                 message=message,
                 type="synthesis",
                 context=context
-            )
+            )):
+                yield event
+            return
         
         # Build enhanced prompt with transcript context
         enhanced_prompt = f"""Based on the user's question and the following video transcripts from their library, provide a comprehensive answer.
@@ -299,42 +551,23 @@ Video Transcripts:
 
 Please provide a detailed answer using the information from these videos. If you reference specific information, mention which video it came from. If the transcripts don't contain enough information to fully answer the question, say so and suggest what additional information might be helpful."""
         
-        # Generate AI response with context
+        # Generate AI response with context, passing text on as it arrives
+        stream = self._strip_stream(self.gemini.generate_response_stream(
+            prompt=enhanced_prompt,
+            conversation_history=conversation_history,
+            conversation_id=conversation_id,
+            query_type="synthesis"
+        ))
         try:
-            # Get the response from Gemini
-            response = await self.gemini.generate_response(
-                prompt=enhanced_prompt,
-                conversation_history=conversation_history,
-                conversation_id=conversation_id,
-                query_type="synthesis"
-            )
-            
-            # Format the response with citations
-            response_text = response.text.strip()
-            
-            # If we have citations, add them to the response
-            if citations:
-                response_text += "\n\nSources:"
-                for i, citation in enumerate(citations, 1):
-                    response_text += f"\n{i}. {citation.title} - {self._format_video_url(citation.video_id, citation.timestamp)}"
-            
-            # Previous versions appended follow-up prompts offering additional
-            # searches or details. These have been removed to avoid cluttering
-            # the assistant's response with unsolicited suggestions.
-            
-            return ChatResponse(
-                message=response_text,
-                type="synthesis",
-                citations=citations,
-                context=context
-            )
+            # Wait for the first chunk so a failed request can still fall back
+            first_chunk = await anext(stream, "")
             
         except Exception as e:
-            logger.error(f"Error generating synthesis response: {e}", exc_info=True)
+            logger.error("Error generating synthesis response: %s", e, exc_info=True)
             
             # Fallback response with the videos we found
             if relevant_videos:
-                return ChatResponse(
+                fallback = ChatResponse(
                     message=f"I found some videos that might contain information about '{effective_query}', but I'm having trouble processing the content right now. You might want to check these videos directly, or try rephrasing your question.",
                     type="synthesis",
                     videos=[
@@ -348,19 +581,87 @@ Please provide a detailed answer using the information from these videos. If you
                     context=context
                 )
             else:
-                return ChatResponse(
+                fallback = ChatResponse(
                     message=f"I'm sorry, but I couldn't find any videos related to '{effective_query}' in your library.",
                     type="synthesis",
                     context=context
                 )
+            async for event in self._response_events(fallback):
+                yield event
+            return
+        
+        yield "meta", {"type": "synthesis", "citations": citations}
+        yield "delta", first_chunk
+        try:
+            async for chunk in stream:
+                yield "delta", chunk
+        except Exception as e:
+            # Keep what was sent and still list the sources
+            logger.error("Error streaming synthesis response: %s", e, exc_info=True)
+        
+        # If we have citations, add them to the response
+        if citations:
+            yield "delta", "\n\nSources:" + "".join(
+                f"\n{i}. {citation.video_title} - {citation.url}"
+                for i, citation in enumerate(citations, 1)
+            )
+        
+        # Previous versions appended follow-up prompts offering additional
+        # searches or details. These have been removed to avoid cluttering
+        # the assistant's response with unsolicited suggestions.
+        yield "end", {}
 
-    async def _handle_conversational_query(
+    async def _collect_transcript_context(
+        self, 
+        videos: List[Dict[str, Any]]
+    ) -> Tuple[str, List[VideoCitation]]:
+        """Build the transcript block of a synthesis prompt and its citations"""
+        transcript_parts = []
+        citations = []
+        
+        # Read the transcript files concurrently, off the event loop
+        transcripts = await asyncio.gather(*[
+            asyncio.to_thread(self.youtube.get_transcript_from_file, video['video_id'])
+            for video in videos
+        ], return_exceptions=True)
+        
+        found = []
+        for video, transcript in zip(videos, transcripts):
+            # Get transcript with error handling
+            if isinstance(transcript, Exception):
+                logger.warning("Error processing video %s: %s", video.get('video_id', 'unknown'), transcript, exc_info=transcript)
+                continue
+            if not transcript:
+                logger.debug("No transcript found for video: %s", video['video_id'])
+                continue
+            found.append((video, transcript))
+        
+        # Split the transcript budget between the videos that have one, so
+        # fewer matches each get more context (truncated to manage token usage)
+        share = get_settings().transcript_char_budget // max(1, len(found))
+        for video, transcript in found:
+            excerpt = _truncate_at_sentence(transcript, share)
+            video_context = f"\n\n--- Video: {video['title']} (Relevance: {video.get('score', 0):.1f}) ---\n{excerpt}...\n"
+            transcript_parts.append(video_context)
+            
+            # Generate citations for this video
+            timestamp = "00:00"  # Default timestamp
+            citations.append(VideoCitation(
+                video_id=video['video_id'],
+                video_title=video['title'],
+                timestamp=timestamp,
+                url=self._format_video_url(video['video_id'], timestamp)
+            ))
+        
+        return "".join(transcript_parts), citations
+
+    async def _stream_conversational_query(
         self, 
         query: str, 
         conversation_history: List[ConversationMessage] = None,
         conversation_id: str = None,
         context: Dict[str, Any] = None
-    ) -> ChatResponse:
+    ) -> AsyncIterator[Tuple[str, Any]]:
         """
         Handle conversational queries (greetings, general chat, non-video questions)
         
@@ -370,10 +671,10 @@ Please provide a detailed answer using the information from these videos. If you
             conversation_id: Unique ID for the conversation
             context: Additional context from intent analysis
             
-        Returns:
-            ChatResponse with a conversational response
+        Yields:
+            Stream events of a conversational response
         """
-        logger.info(f"Handling conversational query: {query}")
+        logger.info("Handling conversational query: %s", query)
         
         # Use the effective query from context if available (e.g., for follow-ups)
         effective_query = context.get('effective_query', query) if context else query
@@ -381,130 +682,73 @@ Please provide a detailed answer using the information from these videos. If you
         # Check if this is a follow-up to a previous query
         is_follow_up = context and context.get('follow_up', False)
         
-        # Build conversational prompt with context
-        prompt_parts = [
-            "You are Project Insight, an AI assistant that helps users explore and understand "
-            "their personal YouTube video library.",
-            "",
-            "The user has sent you a message:",
-            f'"{effective_query}"',
-            ""
-        ]
-        
         # Add context if this is a follow-up
+        follow_up_block = ""
         if is_follow_up and context.get('original_query'):
-            prompt_parts.extend([
-                f"This is a follow-up to your previous query about: {context['original_query']}",
-                ""
-            ])
+            follow_up_block = f"This is a follow-up to your previous query about: {context['original_query']}\n\n"
         
         # Add conversation history for context
+        history_block = ""
         if conversation_history and len(conversation_history) > 0:
-            prompt_parts.append("Previous conversation context:")
+            history_lines = ["Previous conversation context:"]
             for msg in conversation_history[-3:]:  # Only use last 3 messages for context
                 role = "User" if msg.role == "user" else "Assistant"
-                prompt_parts.append(f"{role}: {msg.content}")
-            prompt_parts.append("")
-        
-        # Add instructions with strict constraints
-        prompt_parts.extend([
-            "IMPORTANT: You are an AI assistant that helps users explore their PERSONAL YouTube video library.",
-            "You must ONLY reference videos that exist in the user's personal collection.",
-            "NEVER suggest, recommend, or mention videos that are not in their library.",
-            "NEVER hallucinate or make up video titles, content, or recommendations.",
-            "",
-            "Please respond in a friendly, helpful manner. Here's what you can help with:",
-            "- Answering general questions about the user's video library",
-            "- Helping find specific videos or topics IN THEIR LIBRARY",
-            "- Explaining concepts from the user's videos",
-            "- Suggesting ways to organize or explore their library",
-            "",
-            "If the user asks about videos on a topic, you should:",
-            "1. Acknowledge their question",
-            "2. Offer to search their personal library for relevant videos",
-            "3. NEVER suggest external videos or content not in their library",
-            "",
-            "Keep your response concise and focused.",
-            "",
-            "Your response:"
-        ])
-        
-        conversational_prompt = "\n".join(prompt_parts)
+                history_lines.append(f"{role}: {msg.content}")
+            history_block = "\n".join(history_lines) + "\n\n"
+        
+        # Build conversational prompt with context; only the middle varies
+        conversational_prompt = (
+            f'{_CONVERSATIONAL_PROMPT_HEADER}\n"{effective_query}"\n\n'
+            f'{follow_up_block}{history_block}{_CONVERSATIONAL_PROMPT_FOOTER}'
+        )
         
+        # Get the response from Gemini, passing text on as it arrives
+        stream = self._strip_stream(self.gemini.generate_response_stream(
+            prompt=conversational_prompt,
+            conversation_history=conversation_history,
+            conversation_id=conversation_id,
+            query_type="conversational"
+        ))
         try:
-            # Get the response from Gemini
-            response = await self.gemini.generate_response(
-                prompt=conversational_prompt,
-                conversation_history=conversation_history,
-                conversation_id=conversation_id,
-                query_type="conversational"
-            )
-            
-            # Format the response - handle both dict and object response formats
-            if isinstance(response, dict):
-                # Extract just the response text from the dictionary
-                if 'response' in response:
-                    response_text = response['response'].strip()
-                else:
-                    # Fallback to using the first string value we can find
-                    for key, value in response.items():
-                        if isinstance(value, str) and key != 'model':
-                            response_text = value.strip()
-                            break
-                    else:
-                        # If no string value found, use a default response
-                        response_text = "I'm here to help you explore your YouTube library. What would you like to know?"                
-            else:
-                response_text = response.text.strip()
-            
-            # Add a helpful follow-up if this was a follow-up
-            if is_follow_up:
-                if "?" in effective_query:  # If it was a question
-                    response_text += "\n\nDoes this help answer your question, or would you like me to look for more specific information in your video library?"
-                else:
-                    response_text += "\n\nIs there anything else you'd like to know about this topic or would you like to explore something else in your video library?"
-            
-            return ChatResponse(
-                message=response_text,
-                type="conversational",
-                context=context
-            )
+            # Wait for the first chunk so a failed request can still fall back
+            first_chunk = await anext(stream, "")
             
         except Exception as e:
-            logger.error(f"Error generating conversational response: {e}", exc_info=True)
+            logger.error("Error generating conversational response: %s", e, exc_info=True)
             
-            # Fallback response
-            fallback_responses = [
-                "I'm having trouble understanding that right now. Could you rephrase your question or ask me something else?",
-                "I'm not quite sure how to respond to that. I can help you find videos or answer questions about your library. What would you like to know?",
-                "I'm still learning! Could you try asking me in a different way? I'm best at helping you find and understand videos in your library."
-            ]
+            # Fallback response, context-aware if available
+            intent = context.get('intent') if context else None
+            fallback_responses = _INTENT_FALLBACK_RESPONSES.get(intent, _FALLBACK_RESPONSES)
             
-            # Add context-aware fallback if available
-            if context and context.get('intent') == 'greeting':
-                fallback_responses.append("Hello! I'm here to help you explore your YouTube video library. What would you like to do?")
-            elif context and context.get('intent') == 'capabilities':
-                fallback_responses.append("I can help you search through your YouTube video library, answer questions about your videos, and provide insights about your content. Just let me know what you're looking for!")
-            
-            return ChatResponse(
+            async for event in self._response_events(ChatResponse(
                 message=random.choice(fallback_responses),
                 type="conversational",
                 context=context
-            )
+            )):
+                yield event
+            return
+        
+        yield "meta", {"type": "conversational"}
+        yield "delta", first_chunk
+        try:
+            async for chunk in stream:
+                yield "delta", chunk
+        except Exception as e:
+            logger.error("Error streaming conversational response: %s", e, exc_info=True)
+        
+        # Add a helpful follow-up if this was a follow-up
+        if is_follow_up:
+            if "?" in effective_query:  # If it was a question
+                yield "delta", "\n\nDoes this help answer your question, or would you like me to look for more specific information in your video library?"
+            else:
+                yield "delta", "\n\nIs there anything else you'd like to know about this topic or would you like to explore something else in your video library?"
+        yield "end", {}
 
     def _format_video_url(self, video_id: str, timestamp: str = None) -> str:
         """Format YouTube URL with optional timestamp"""
         url = f"https://www.youtube.com/watch?v={video_id}"
         if timestamp:
-            # Convert timestamp to seconds if needed
-            if ':' in timestamp:  # Format: HH:MM:SS or MM:SS
-                parts = timestamp.split(':')
-                if len(parts) == 3:  # HH:MM:SS
-                    h, m, s = parts
-                    seconds = int(h) * 3600 + int(m) * 60 + int(s)
-                else:  # MM:SS
-                    m, s = parts
-                    seconds = int(m) * 60 + int(s)
-                timestamp = str(seconds)
-            url += f"&t={timestamp}"
+            timestamp = _timestamp_to_seconds(timestamp)
+            if timestamp is not None:
+                url += f"&t={timestamp}"
         return url
@@ -1,12 +1,13 @@
 import os
 import sqlite3
-from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+__all__ = ["Settings", "get_settings", "clear_settings_cache", "ensure_data_directories"]
+
 class Settings(BaseSettings):
     """Application settings"""
     
@@ -23,14 +24,21 @@ class Settings(BaseSettings):
     gemini_model: str = "gemini-2.5-flash-preview-05-20"
     max_conversation_history: int = 10
     max_tokens_per_request: int = 30000
+    # Transcript characters included in a synthesis prompt, shared by its videos
+    transcript_char_budget: int = 7500
     
     # YouTube Configuration
     max_videos_per_sync: int = 1000
     
+    # Cache - a local Redis socket skips the TCP stack when Redis is colocated
+    redis_socket_path: Optional[str] = None
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
+        # .env also holds keys read directly by other modules (ENCRYPTION_KEY)
+        extra = "ignore"
     
     def __init__(self, **data):
         """Initialize settings with encrypted key loading"""
@@ -62,58 +70,61 @@ class Settings(BaseSettings):
             # Import here to avoid circular dependency
             from security import decrypt_value
             
+            # Fetch every missing key in one query
+            wanted = [
+                key_name for key_name, value in (
+                    ("GOOGLE_AI_API_KEY", self.google_ai_api_key),
+                    ("YOUTUBE_API_KEY", self.youtube_api_key),
+                    ("GOOGLE_CLOUD_PROJECT_ID", self.google_cloud_project_id)
+                ) if not value
+            ]
+            cursor.execute(
+                f"SELECT key_name, encrypted_value FROM encrypted_keys "
+                f"WHERE key_name IN ({', '.join('?' * len(wanted))})",
+                wanted
+            )
+            rows = {key_name: value for key_name, value in cursor.fetchall()}
+            
             # Load Google AI API Key
-            if not self.google_ai_api_key:
-                cursor.execute(
-                    "SELECT encrypted_value FROM encrypted_keys WHERE key_name = ?",
-                    ("GOOGLE_AI_API_KEY",)
-                )
-                result = cursor.fetchone()
-                if result:
-                    try:
-                        self.google_ai_api_key = decrypt_value(result[0])
-                        logger.info("Loaded Google AI API Key from encrypted storage")
-                    except Exception as e:
-                        logger.error(f"Failed to decrypt Google AI API Key: {e}")
+            if "GOOGLE_AI_API_KEY" in rows:
+                try:
+                    self.google_ai_api_key = decrypt_value(rows["GOOGLE_AI_API_KEY"])
+                    logger.info("Loaded Google AI API Key from encrypted storage")
+                except Exception as e:
+                    logger.error(f"Failed to decrypt Google AI API Key: {e}")
             
             # Load YouTube API Key
-            if not self.youtube_api_key:
-                cursor.execute(
-                    "SELECT encrypted_value FROM encrypted_keys WHERE key_name = ?",
-                    ("YOUTUBE_API_KEY",)
-                )
-                result = cursor.fetchone()
-                if result:
-                    try:
-                        self.youtube_api_key = decrypt_value(result[0])
-                        logger.info("Loaded YouTube API Key from encrypted storage")
-                    except Exception as e:
-                        logger.error(f"Failed to decrypt YouTube API Key: {e}")
+            if "YOUTUBE_API_KEY" in rows:
+                try:
+                    self.youtube_api_key = decrypt_value(rows["YOUTUBE_API_KEY"])
+                    logger.info("Loaded YouTube API Key from encrypted storage")
+                except Exception as e:
+                    logger.error(f"Failed to decrypt YouTube API Key: {e}")
             
             # Load Google Cloud Project ID (not encrypted)
-            if not self.google_cloud_project_id:
-                cursor.execute(
-                    "SELECT encrypted_value FROM encrypted_keys WHERE key_name = ?",
-                    ("GOOGLE_CLOUD_PROJECT_ID",)
-                )
-                result = cursor.fetchone()
-                if result:
-                    self.google_cloud_project_id = result[0]
-                    logger.info("Loaded Google Cloud Project ID from storage")
+            if "GOOGLE_CLOUD_PROJECT_ID" in rows:
+                self.google_cloud_project_id = rows["GOOGLE_CLOUD_PROJECT_ID"]
+                logger.info("Loaded Google Cloud Project ID from storage")
             
             conn.close()
             
         except Exception as e:
             logger.error(f"Error loading encrypted keys: {e}")
 
-@lru_cache()
+# Loaded on first use rather than at import
+_settings: Optional[Settings] = None
+
 def get_settings() -> Settings:
     """Get cached settings instance"""
-    return Settings()
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
 
 def clear_settings_cache():
     """Clear the settings cache to reload configuration"""
-    get_settings.cache_clear()
+    global _settings
+    _settings = None
     logger.info("Settings cache cleared - configuration will be reloaded on next access")
 
 def ensure_data_directories():
@@ -122,10 +133,8 @@ def ensure_data_directories():
     
     # Create data directory
     data_dir = os.path.dirname(settings.database_path)
-    os.makedirs(data_dir, exist_ok=True)
+    if data_dir:  # A bare filename lives in the working directory
+        os.makedirs(data_dir, exist_ok=True)
     
     # Create transcripts directory
     os.makedirs(settings.transcripts_dir, exist_ok=True)
-
-# Ensure data directories are created when this module is imported
-ensure_data_directories()
\ No newline at end of file
@@ -1,21 +1,51 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, ORJSONResponse
+import asyncio
+from datetime import date
 from typing import Dict, Any, Optional
 import logging
 
-from cost_tracking_service import CostTrackingService
+try:
+    import orjson  # noqa: F401
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from cost_tracking_service import get_cost_tracker
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/cost", tags=["cost"])
+# Dashboards poll these endpoints; orjson serializes the stats payloads much faster
+router = APIRouter(
+    prefix="/api/cost",
+    tags=["cost"],
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+)
+
+# Define some reasonable limits (these could be configurable)
+DAILY_COST_LIMIT = 5.00  # $5 per day
+MONTHLY_COST_LIMIT = 100.00  # $100 per month
+DAILY_TOKEN_LIMIT = 1000000  # 1M tokens per day
+
+# Warn at 80% of each limit
+_DAILY_COST_WARN = DAILY_COST_LIMIT * 0.8
+_MONTHLY_COST_WARN = MONTHLY_COST_LIMIT * 0.8
+_DAILY_TOKEN_WARN = DAILY_TOKEN_LIMIT * 0.8
 
-# Initialize cost tracking service
-cost_tracker = CostTrackingService()
+@router.on_event("shutdown")
+def close_cost_tracker():
+    """Release the cost tracker's database connections"""
+    # Nothing to release if no request ever created the tracker
+    if get_cost_tracker.cache_info().currsize:
+        get_cost_tracker().close()
 
 @router.get("/usage/overall")
 async def get_overall_usage() -> Dict[str, Any]:
     """Get overall API usage statistics"""
     try:
-        stats = cost_tracker.get_usage_stats()
+        tracker = get_cost_tracker()
+        # The tracker makes blocking sqlite3 calls, so keep them off the event loop
+        stats = await asyncio.to_thread(tracker.get_usage_stats)
         return {
             "success": True,
             "data": stats
@@ -28,7 +58,8 @@ async def get_overall_usage() -> Dict[str, Any]:
 async def get_usage_by_type() -> Dict[str, Any]:
     """Get API usage statistics grouped by query type"""
     try:
-        stats = cost_tracker.get_usage_by_type()
+        tracker = get_cost_tracker()
+        stats = await asyncio.to_thread(tracker.get_usage_by_type)
         return {
             "success": True,
             "data": stats
@@ -41,10 +72,11 @@ async def get_usage_by_type() -> Dict[str, Any]:
 async def get_daily_usage(days: Optional[int] = 7) -> Dict[str, Any]:
     """Get daily API usage statistics for the last N days"""
     try:
+        tracker = get_cost_tracker()
         if days < 1 or days > 365:
             raise HTTPException(status_code=400, detail="Days must be between 1 and 365")
         
-        stats = cost_tracker.get_daily_usage(days)
+        stats = await asyncio.to_thread(tracker.get_daily_usage, days)
         return {
             "success": True,
             "data": stats
@@ -59,35 +91,40 @@ async def get_daily_usage(days: Optional[int] = 7) -> Dict[str, Any]:
 async def check_usage_limits() -> Dict[str, Any]:
     """Check if usage is approaching or exceeding limits"""
     try:
-        # Get current usage stats
-        overall_stats = cost_tracker.get_usage_stats()
-        daily_stats = cost_tracker.get_daily_usage(1)
-        
-        # Define some reasonable limits (these could be configurable)
-        daily_cost_limit = 5.00  # $5 per day
-        monthly_cost_limit = 100.00  # $100 per month
-        daily_token_limit = 1000000  # 1M tokens per day
+        tracker = get_cost_tracker()
+        # Get current usage stats; the queries are independent and run on
+        # separate pooled connections
+        overall_stats, daily_stats = await asyncio.gather(
+            asyncio.to_thread(tracker.get_usage_stats),
+            asyncio.to_thread(tracker.get_daily_usage, 1)
+        )
         
         # Calculate current usage
-        today_cost = daily_stats[0]['total_cost'] if daily_stats else 0
-        today_tokens = daily_stats[0]['total_tokens'] if daily_stats else 0
-        total_cost = overall_stats['total_cost']
-        
-        # Check limits
-        warnings = []
-        if today_cost > daily_cost_limit * 0.8:  # 80% of daily limit
-            warnings.append(f"Daily cost approaching limit: ${today_cost:.4f} / ${daily_cost_limit}")
-        
-        if today_tokens > daily_token_limit * 0.8:  # 80% of daily token limit
-            warnings.append(f"Daily tokens approaching limit: {today_tokens:,} / {daily_token_limit:,}")
+        today = date.today().isoformat()
+        today_stats = next((day for day in daily_stats if day['date'] == today), None)
+        today_cost = today_stats['cost'] if today_stats else 0
+        today_tokens = today_stats['tokens'] if today_stats else 0
+        total_cost = overall_stats.total_cost_usd
         
-        if total_cost > monthly_cost_limit * 0.8:  # 80% of monthly limit
-            warnings.append(f"Total cost approaching monthly limit: ${total_cost:.4f} / ${monthly_cost_limit}")
+        # Check limits; the messages are only formatted once a threshold is crossed
+        if (today_cost <= _DAILY_COST_WARN and today_tokens <= _DAILY_TOKEN_WARN
+                and total_cost <= _MONTHLY_COST_WARN):
+            warnings = ()
+        else:
+            warnings = []
+            if today_cost > _DAILY_COST_WARN:
+                warnings.append(f"Daily cost approaching limit: ${today_cost:.4f} / ${DAILY_COST_LIMIT}")
+            
+            if today_tokens > _DAILY_TOKEN_WARN:
+                warnings.append(f"Daily tokens approaching limit: {today_tokens:,} / {DAILY_TOKEN_LIMIT:,}")
+            
+            if total_cost > _MONTHLY_COST_WARN:
+                warnings.append(f"Total cost approaching monthly limit: ${total_cost:.4f} / ${MONTHLY_COST_LIMIT}")
         
         return {
             "success": True,
             "data": {
-                "within_limits": len(warnings) == 0,
+                "within_limits": not warnings,
                 "warnings": warnings,
                 "current_usage": {
                     "today_cost": today_cost,
@@ -95,9 +132,9 @@ async def check_usage_limits() -> Dict[str, Any]:
                     "total_cost": total_cost
                 },
                 "limits": {
-                    "daily_cost_limit": daily_cost_limit,
-                    "monthly_cost_limit": monthly_cost_limit,
-                    "daily_token_limit": daily_token_limit
+                    "daily_cost_limit": DAILY_COST_LIMIT,
+                    "monthly_cost_limit": MONTHLY_COST_LIMIT,
+                    "daily_token_limit": DAILY_TOKEN_LIMIT
                 }
             }
         }
@@ -1,14 +1,98 @@
+import atexit
+import copy
 import sqlite3
 import logging
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from contextlib import contextmanager
+from functools import lru_cache, wraps
 
-from config import get_settings
+from cachetools import TTLCache
+
+from config import get_settings, ensure_data_directories
 from models import BaseModel
+from sqlite_pool import SQLitePool, DEFAULT_PRAGMAS
 
 logger = logging.getLogger(__name__)
 
+# Usage tracking is a hot write path, so keep temp tables in memory and map
+# the database file for reads on top of the shared defaults
+COST_DB_PRAGMAS = DEFAULT_PRAGMAS + (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Hot-path statements, kept as constants so every call hands sqlite3 the
+# same text and hits its per-connection statement cache
+_INSERT_USAGE_SQL = """
+    INSERT INTO api_usage (
+        timestamp, conversation_id, model, prompt_tokens, 
+        completion_tokens, total_tokens, cost_usd, query_type, ts_us
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_UPSERT_DAILY_SQL = """
+    INSERT INTO api_usage_daily (date, requests, tokens, cost)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(date) DO UPDATE SET
+        requests = requests + excluded.requests,
+        tokens = tokens + excluded.tokens,
+        cost = cost + excluded.cost
+"""
+_USAGE_STATS_SQL = """
+    WITH by_type AS MATERIALIZED (
+        SELECT 
+            query_type,
+            COUNT(*) as requests,
+            SUM(total_tokens) as tokens,
+            SUM(cost_usd) as cost
+        FROM api_usage 
+        WHERE ts_us >= ?
+        GROUP BY query_type
+    )
+    SELECT 0 as is_total, query_type, requests, tokens, cost FROM by_type
+    UNION ALL
+    SELECT 1, NULL, SUM(requests), SUM(tokens), SUM(cost) FROM by_type
+"""
+_DAILY_USAGE_SQL = """
+    SELECT date, requests, tokens, ROUND(cost, 6) as cost
+    FROM api_usage_daily 
+    WHERE date >= ?
+    ORDER BY date DESC
+"""
+_LIMITS_SNAPSHOT_SQL = """
+    SELECT 
+        SUM(CASE WHEN ts_us >= :day_start THEN cost_usd END) as daily_cost,
+        SUM(cost_usd) as monthly_cost
+    FROM api_usage 
+    WHERE ts_us >= :month_start
+"""
+
+def _to_us(moment: datetime) -> int:
+    """Convert a datetime to integer Unix microseconds, the ts_us column's unit"""
+    return int(moment.timestamp() * 1_000_000)
+
+def _cached_stats(method):
+    """Serve repeated stats reads from the service's short-lived cache
+
+    Buffered usage is flushed first; a flush that writes anything clears the
+    cache, so a cached result never hides committed usage.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.flush()
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        with self._stats_lock:
+            if key in self._stats_cache:
+                return copy.deepcopy(self._stats_cache[key])
+        result = method(self, *args, **kwargs)
+        with self._stats_lock:
+            self._stats_cache[key] = result
+        return copy.deepcopy(result)
+    return wrapper
+
 class TokenUsage(BaseModel):
     """Token usage data model"""
     prompt_tokens: int
@@ -45,9 +129,43 @@ class CostTrackingService:
         }
     }
     
+    # (input, output) USD per single token, derived once from the table above
+    PRICE_PER_TOKEN = {
+        model: (
+            pricing["input_tokens_per_million"] / 1_000_000,
+            pricing["output_tokens_per_million"] / 1_000_000
+        )
+        for model, pricing in GEMINI_PRICING.items()
+    }
+    
+    # Buffered usage rows are written once this many are pending, or every
+    # FLUSH_INTERVAL seconds, whichever comes first
+    FLUSH_BATCH_SIZE = 100
+    FLUSH_INTERVAL = 0.5
+    # Dashboards poll the stats endpoints far more often than usage changes
+    STATS_CACHE_TTL = 5
+    
     def __init__(self):
         self.settings = get_settings()
+        self._pending: deque = deque()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._stats_cache: TTLCache = TTLCache(maxsize=16, ttl=self.STATS_CACHE_TTL)
+        self._stats_lock = threading.Lock()
+        ensure_data_directories()
+        self._pool = SQLitePool(
+            self.settings.database_path,
+            max_size=10,
+            pragmas=COST_DB_PRAGMAS,
+            row_factory=sqlite3.Row,
+            cached_statements=256
+        )
         self._init_cost_tracking_table()
+        self._flusher = threading.Thread(target=self._flush_loop, name="cost-usage-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
     
     def _init_cost_tracking_table(self):
         """Initialize the cost tracking table in database"""
@@ -66,14 +184,58 @@ class CostTrackingService:
                         total_tokens INTEGER NOT NULL,
                         cost_usd REAL NOT NULL,
                         query_type TEXT,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                        ts_us INTEGER
                     )
                 """)
                 
-                # Create indexes for better performance
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_timestamp ON api_usage(timestamp)")
+                # ts_us holds the same instant as timestamp in Unix microseconds;
+                # range filters on an INTEGER are cheaper than on ISO text. Add it
+                # to tables created before it existed and backfill from timestamp,
+                # which is recorded in local time.
+                cursor.execute("PRAGMA table_info(api_usage)")
+                if "ts_us" not in {column[1] for column in cursor.fetchall()}:
+                    cursor.execute("ALTER TABLE api_usage ADD COLUMN ts_us INTEGER")
+                cursor.execute("""
+                    UPDATE api_usage
+                    SET ts_us = CAST(ROUND((julianday(timestamp, 'utc') - 2440587.5) * 86400000000) AS INTEGER)
+                    WHERE ts_us IS NULL
+                """)
+                
+                # Create indexes for better performance. The stats queries filter on
+                # ts_us and read only these columns, so they never touch the table
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_usage_tsus_type_cov
+                    ON api_usage(ts_us, query_type, total_tokens, cost_usd)
+                """)
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_conversation ON api_usage(conversation_id)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_model ON api_usage(model)")
+                # Superseded by the covering index / not used by any query
+                cursor.execute("DROP INDEX IF EXISTS idx_usage_ts_type_cov")
+                cursor.execute("DROP INDEX IF EXISTS idx_usage_timestamp")
+                cursor.execute("DROP INDEX IF EXISTS idx_usage_model")
+                
+                # Per-day totals, kept up to date by flush() so daily usage
+                # never has to scan the raw rows
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS api_usage_daily (
+                        date TEXT PRIMARY KEY,
+                        requests INTEGER NOT NULL,
+                        tokens INTEGER NOT NULL,
+                        cost REAL NOT NULL
+                    )
+                """)
+                
+                # Backfill from usage recorded before the rollup existed
+                cursor.execute("""
+                    INSERT INTO api_usage_daily (date, requests, tokens, cost)
+                    SELECT DATE(timestamp), COUNT(*), SUM(total_tokens), SUM(cost_usd)
+                    FROM api_usage
+                    WHERE NOT EXISTS (SELECT 1 FROM api_usage_daily)
+                    GROUP BY DATE(timestamp)
+                """)
+                
+                # Refresh planner statistics so the covering index is picked
+                cursor.execute("ANALYZE api_usage")
                 
                 conn.commit()
                 logger.info("Cost tracking table initialized successfully")
@@ -84,26 +246,61 @@ class CostTrackingService:
     
     @contextmanager
     def _get_db_connection(self):
-        """Get database connection with automatic cleanup"""
-        conn = sqlite3.connect(self.settings.database_path)
-        conn.row_factory = sqlite3.Row
-        try:
+        """Borrow a pooled database connection for the duration of the block"""
+        with self._pool.connection() as conn:
             yield conn
-        finally:
-            conn.close()
+
+    def _flush_loop(self) -> None:
+        """Write buffered usage rows in batches until the service is closed"""
+        while not self._closed:
+            self._wake.wait(self.FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write every buffered usage row in a single transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+            
+            try:
+                with self._get_db_connection() as conn:
+                    conn.executemany(_INSERT_USAGE_SQL, batch)
+                    
+                    daily: Dict[str, List] = {}
+                    for row in batch:
+                        totals = daily.setdefault(row[0][:10], [0, 0, 0.0])
+                        totals[0] += 1
+                        totals[1] += row[5]
+                        totals[2] += row[6]
+                    conn.executemany(_UPSERT_DAILY_SQL, [(date, *totals) for date, totals in daily.items()])
+                    conn.commit()
+                    logger.info(f"Tracked usage for {len(batch)} requests")
+                with self._stats_lock:
+                    self._stats_cache.clear()
+            except Exception as e:
+                logger.error(f"Error tracking usage: {e}")
+                # Don't raise exception to avoid breaking the main flow
+    
+    def close(self):
+        """Flush buffered usage and close the pooled database connections"""
+        self._closed = True
+        self._wake.set()
+        self.flush()
+        self._pool.close_all()
     
     def calculate_cost(self, prompt_tokens: int, completion_tokens: int, model: str) -> float:
         """Calculate cost in USD for given token usage"""
-        if model not in self.GEMINI_PRICING:
+        price = self.PRICE_PER_TOKEN.get(model)
+        if price is None:
             logger.warning(f"Unknown model {model}, using gemini-1.5-pro pricing")
-            model = "gemini-1.5-pro"
-        
-        pricing = self.GEMINI_PRICING[model]
-        
-        input_cost = (prompt_tokens / 1_000_000) * pricing["input_tokens_per_million"]
-        output_cost = (completion_tokens / 1_000_000) * pricing["output_tokens_per_million"]
+            price = self.PRICE_PER_TOKEN["gemini-1.5-pro"]
         
-        return round(input_cost + output_cost, 6)  # Round to 6 decimal places
+        input_price, output_price = price
+        return round(prompt_tokens * input_price + completion_tokens * output_price, 6)  # Round to 6 decimal places
     
     def track_usage(
         self, 
@@ -116,7 +313,8 @@ class CostTrackingService:
         """Track API usage and store in database"""
         total_tokens = prompt_tokens + completion_tokens
         cost_usd = self.calculate_cost(prompt_tokens, completion_tokens, model)
-        timestamp = datetime.now().isoformat()
+        now = time.time()
+        timestamp = datetime.fromtimestamp(now).isoformat()
         
         usage = TokenUsage(
             prompt_tokens=prompt_tokens,
@@ -129,29 +327,20 @@ class CostTrackingService:
             query_type=query_type
         )
         
-        try:
-            with self._get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT INTO api_usage (
-                        timestamp, conversation_id, model, prompt_tokens, 
-                        completion_tokens, total_tokens, cost_usd, query_type
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    timestamp, conversation_id, model, prompt_tokens,
-                    completion_tokens, total_tokens, cost_usd, query_type
-                ))
-                
-                conn.commit()
-                logger.info(f"Tracked usage: {total_tokens} tokens, ${cost_usd:.6f}")
-                
-        except Exception as e:
-            logger.error(f"Error tracking usage: {e}")
-            # Don't raise exception to avoid breaking the main flow
+        # Buffered; the flusher thread commits rows in batches off the request path
+        with self._pending_lock:
+            self._pending.append((
+                timestamp, conversation_id, model, prompt_tokens,
+                completion_tokens, total_tokens, cost_usd, query_type,
+                int(now * 1_000_000)
+            ))
+            pending = len(self._pending)
+        if pending >= self.FLUSH_BATCH_SIZE:
+            self._wake.set()
         
         return usage
     
+    @_cached_stats
     def get_usage_stats(self, days: int = 30) -> UsageStats:
         """Get usage statistics for the last N days"""
         end_date = datetime.now()
@@ -161,38 +350,20 @@ class CostTrackingService:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Get overall stats
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_requests,
-                        SUM(total_tokens) as total_tokens,
-                        SUM(cost_usd) as total_cost,
-                        AVG(total_tokens) as avg_tokens
-                    FROM api_usage 
-                    WHERE timestamp >= ?
-                """, (start_date.isoformat(),))
-                
-                row = cursor.fetchone()
-                
-                total_requests = row['total_requests'] or 0
-                total_tokens = row['total_tokens'] or 0
-                total_cost = row['total_cost'] or 0.0
-                avg_tokens = row['avg_tokens'] or 0.0
-                
-                # Get breakdown by query type
-                cursor.execute("""
-                    SELECT 
-                        query_type,
-                        COUNT(*) as requests,
-                        SUM(total_tokens) as tokens,
-                        SUM(cost_usd) as cost
-                    FROM api_usage 
-                    WHERE timestamp >= ?
-                    GROUP BY query_type
-                """, (start_date.isoformat(),))
+                # SQLite has no GROUP BY ROLLUP, so append the totals row to the
+                # per-type groups with UNION ALL over a single scan of the window
+                cursor.execute(_USAGE_STATS_SQL, (_to_us(start_date),))
                 
+                total_requests = 0
+                total_tokens = 0
+                total_cost = 0.0
                 breakdown = {}
                 for row in cursor.fetchall():
+                    if row['is_total']:
+                        total_requests = row['requests'] or 0
+                        total_tokens = row['tokens'] or 0
+                        total_cost = row['cost'] or 0.0
+                        continue
                     query_type = row['query_type'] or 'unknown'
                     breakdown[query_type] = {
                         'requests': row['requests'],
@@ -200,6 +371,8 @@ class CostTrackingService:
                         'cost': row['cost']
                     }
                 
+                avg_tokens = total_tokens / total_requests if total_requests else 0.0
+                
                 return UsageStats(
                     total_requests=total_requests,
                     total_tokens=total_tokens,
@@ -223,6 +396,7 @@ class CostTrackingService:
                 breakdown_by_type={}
             )
     
+    @_cached_stats
     def get_daily_usage(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get daily usage breakdown for the last N days"""
         end_date = datetime.now()
@@ -231,41 +405,43 @@ class CostTrackingService:
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
+                # Plain tuples unpack faster than sqlite3.Row lookups
+                cursor.row_factory = None
                 
-                cursor.execute("""
-                    SELECT 
-                        DATE(timestamp) as date,
-                        COUNT(*) as requests,
-                        SUM(total_tokens) as tokens,
-                        SUM(cost_usd) as cost
-                    FROM api_usage 
-                    WHERE timestamp >= ?
-                    GROUP BY DATE(timestamp)
-                    ORDER BY date DESC
-                """, (start_date.isoformat(),))
-                
-                daily_stats = []
-                for row in cursor.fetchall():
-                    daily_stats.append({
-                        'date': row['date'],
-                        'requests': row['requests'],
-                        'tokens': row['tokens'],
-                        'cost': round(row['cost'], 6)
-                    })
+                cursor.execute(_DAILY_USAGE_SQL, (start_date.date().isoformat(),))
                 
-                return daily_stats
+                return [
+                    {'date': date, 'requests': requests, 'tokens': tokens, 'cost': cost}
+                    for date, requests, tokens, cost in cursor.fetchall()
+                ]
                 
         except Exception as e:
             logger.error(f"Error getting daily usage: {e}")
             return []
     
+    @_cached_stats
+    def _get_limits_snapshot(self) -> Tuple[float, float]:
+        """Get (daily_cost, monthly_cost) for the last 1 and 30 days in one query"""
+        now = datetime.now()
+        day_start = _to_us(now - timedelta(days=1))
+        month_start = _to_us(now - timedelta(days=30))
+        
+        try:
+            with self._get_db_connection() as conn:
+                row = conn.execute(_LIMITS_SNAPSHOT_SQL, {"day_start": day_start, "month_start": month_start}).fetchone()
+                
+                return round(row['daily_cost'] or 0.0, 6), round(row['monthly_cost'] or 0.0, 6)
+                
+        except Exception as e:
+            logger.error(f"Error getting usage limits snapshot: {e}")
+            return 0.0, 0.0
+    
     def check_usage_limits(self, daily_limit_usd: float = 5.0, monthly_limit_usd: float = 50.0) -> Dict[str, Any]:
         """Check if usage is approaching limits"""
-        today_stats = self.get_usage_stats(days=1)
-        monthly_stats = self.get_usage_stats(days=30)
+        daily_cost, monthly_cost = self._get_limits_snapshot()
         
-        daily_usage_pct = (today_stats.total_cost_usd / daily_limit_usd) * 100 if daily_limit_usd > 0 else 0
-        monthly_usage_pct = (monthly_stats.total_cost_usd / monthly_limit_usd) * 100 if monthly_limit_usd > 0 else 0
+        daily_usage_pct = (daily_cost / daily_limit_usd) * 100 if daily_limit_usd > 0 else 0
+        monthly_usage_pct = (monthly_cost / monthly_limit_usd) * 100 if monthly_limit_usd > 0 else 0
         
         warnings = []
         if daily_usage_pct > 80:
@@ -274,13 +450,18 @@ class CostTrackingService:
             warnings.append(f"Monthly usage at {monthly_usage_pct:.1f}% of limit")
         
         return {
-            'daily_usage_usd': today_stats.total_cost_usd,
+            'daily_usage_usd': daily_cost,
             'daily_limit_usd': daily_limit_usd,
             'daily_usage_percentage': round(daily_usage_pct, 1),
-            'monthly_usage_usd': monthly_stats.total_cost_usd,
+            'monthly_usage_usd': monthly_cost,
             'monthly_limit_usd': monthly_limit_usd,
             'monthly_usage_percentage': round(monthly_usage_pct, 1),
             'warnings': warnings,
-            'is_over_daily_limit': today_stats.total_cost_usd > daily_limit_usd,
-            'is_over_monthly_limit': monthly_stats.total_cost_usd > monthly_limit_usd
-        }
\ No newline at end of file
+            'is_over_daily_limit': daily_cost > daily_limit_usd,
+            'is_over_monthly_limit': monthly_cost > monthly_limit_usd
+        }
+
+@lru_cache(maxsize=None)
+def get_cost_tracker() -> CostTrackingService:
+    """Get the shared cost tracking service, creating it on first use"""
+    return CostTrackingService()
\ No newline at end of file
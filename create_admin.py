@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 """Script to create an admin user for the YouTube AI Organizer"""
 
-import sqlite3
-import os
 import sys
 from getpass import getpass
 from auth import UserCreate, create_user
@@ -46,24 +44,13 @@ def create_admin_user():
     
     # Create the user
     try:
-        # First create as regular user
         user_data = UserCreate(
             username=username,
             email=email,
             password=password
         )
-        user = create_user(user_data)
-        
-        # Then update to admin
-        db_path = os.path.join(os.path.dirname(__file__), "data", "project_insight.db")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE users SET is_admin = TRUE WHERE username = ?",
-            (username,)
-        )
-        conn.commit()
-        conn.close()
+        # Created as admin in the same insert, so there is a single commit
+        user = create_user(user_data, is_admin=True)
         
         print(f"\n✓ Admin user '{username}' created successfully!")
         print("\nYou can now login with these credentials at http://localhost:3000/login")
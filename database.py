@@ -1,23 +1,120 @@
+import os
 import sqlite3
 import logging
+import threading
 from contextlib import contextmanager
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Iterator, Sequence
+
+from cachetools import TTLCache
 
 from config import get_settings, ensure_data_directories
 from models import VideoMetadata
 from database_migrations import run_migrations
-from database_search import search_videos_safe
+from database_fts import FullTextSearch
+from sqlite_pool import SQLitePool, DEFAULT_PRAGMAS
 
 logger = logging.getLogger(__name__)
 
+# Connections are opened once and reused, so these settings stay in effect
+# for every call instead of being lost with each short-lived connection
+DB_PRAGMAS = DEFAULT_PRAGMAS + (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Reads never change the file, so reader connections are opened read-only
+# and only get the settings that apply to queries
+READER_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Opened on first use against the configured database. In WAL mode readers
+# do not block the writer or each other, so searches and listings get their
+# own read-only pool, one connection per core, alongside the general pool.
+_db_pool: Optional[SQLitePool] = None
+_reader_pool: Optional[SQLitePool] = None
+_db_pool_file: Optional[tuple] = None
+_db_pool_lock = threading.Lock()
+
+# Search results keyed on the data version they were read at. Writes made
+# through this module bump the version so stale entries stop matching at
+# once; writes from other processes or raw connections aren't seen, so
+# entries also expire after QUERY_CACHE_TTL seconds
+QUERY_CACHE_TTL = 60
+_query_cache: TTLCache = TTLCache(maxsize=512, ttl=QUERY_CACHE_TTL)
+_query_cache_lock = threading.Lock()
+_data_version = 0
+
+# Local ISO-8601 timestamp computed inside SQLite, in the same shape as
+# datetime.now().isoformat() so existing values still sort alongside it
+_NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+# SQL for the hot paths, kept as constants so the exact same text is passed
+# each time and sqlite3's per-connection statement cache gets hits
+
+# Inserts a new video or refreshes an existing one; created_at is kept on update
+_UPSERT_VIDEO_SQL = f"""
+    INSERT INTO videos (
+        video_id, title, description, channel_id, channel_title,
+        published_at, duration, thumbnail_url, view_count, like_count,
+        has_transcript, transcript_language, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {_NOW_SQL}, {_NOW_SQL})
+    ON CONFLICT(video_id) DO UPDATE SET
+        title = excluded.title,
+        description = excluded.description,
+        channel_id = excluded.channel_id,
+        channel_title = excluded.channel_title,
+        published_at = excluded.published_at,
+        duration = excluded.duration,
+        thumbnail_url = excluded.thumbnail_url,
+        view_count = excluded.view_count,
+        like_count = excluded.like_count,
+        has_transcript = excluded.has_transcript,
+        transcript_language = excluded.transcript_language,
+        updated_at = excluded.updated_at
+"""
+_ALL_VIDEOS_SQL = "SELECT {columns} FROM videos ORDER BY published_at DESC LIMIT ? OFFSET ?"
+_VIDEO_EXISTS_SQL = "SELECT 1 FROM videos WHERE video_id = ?"
+_COUNT_VIDEOS_SQL = "SELECT COUNT(*) FROM videos"
+_UPDATE_TRANSCRIPT_STATUS_SQL = f"""
+    UPDATE videos SET 
+        has_transcript = ?, 
+        transcript_language = ?,
+        updated_at = {_NOW_SQL}
+    WHERE video_id = ?
+"""
+
+# Columns a video listing needs; descriptions and other bulky fields are
+# left in the database unless a caller asks for them. Migration 008 indexes
+# exactly these, so keep the two in step.
+VIDEO_SUMMARY_COLUMNS = (
+    "video_id", "title", "channel_title", "published_at", "thumbnail_url",
+    "duration", "has_transcript",
+)
+
+# Videos returned per listing page by default, and the most a caller may ask for
+VIDEO_PAGE_SIZE = 100
+MAX_VIDEO_PAGE_SIZE = 500
+
+def _database_file_id(path: str) -> Optional[tuple]:
+    """Identify the file currently at path, or None if there is none"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
 def init_database():
     """Initialize the SQLite database with required tables"""
     ensure_data_directories()
-    settings = get_settings()
+    _reopen_if_replaced()
     
     try:
-        with sqlite3.connect(settings.database_path) as conn:
+        with get_db_connection() as conn:
             cursor = conn.cursor()
             
             # Create videos table
@@ -63,7 +160,7 @@ def init_database():
             
             # Create indexes for better performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos(channel_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_published ON videos(published_at)")
+            # published_at is indexed by the covering listing index from migration 008
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_transcript ON videos(has_transcript)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id)")
             
@@ -74,98 +171,205 @@ def init_database():
         logger.error(f"Error initializing database: {e}")
         raise
 
+def _open_pools(database_path: str) -> None:
+    """Replace the pools with new ones for database_path
+    
+    The caller holds _db_pool_lock. Connections still borrowed from the old
+    pools are closed when they are returned.
+    """
+    global _db_pool, _reader_pool, _db_pool_file
+    for pool in (_db_pool, _reader_pool):
+        if pool is not None:
+            pool.close()
+    db_pool = SQLitePool(
+        database_path,
+        pragmas=DB_PRAGMAS,
+        row_factory=sqlite3.Row,  # Enable dict-like access to rows
+        cached_statements=256
+    )
+    # Open the first connection now so the file exists and can be identified
+    with db_pool.connection():
+        pass
+    _db_pool_file = _database_file_id(database_path)
+    # The reader pool goes in first: _get_db_pool() hands out _db_pool
+    # without the lock, and _get_reader_pool() follows it
+    _reader_pool = SQLitePool(
+        f"{Path(database_path).absolute().as_uri()}?mode=ro",
+        max_size=os.cpu_count() or 4,
+        pragmas=READER_PRAGMAS,
+        row_factory=sqlite3.Row,
+        uri=True,
+        cached_statements=256
+    )
+    _db_pool = db_pool
+    invalidate_query_cache()
+
+def _reopen_if_replaced() -> None:
+    """Start over if the database file was deleted or replaced
+    
+    Pooled connections keep the file they opened. Checking costs a stat, so
+    it is done when the database is initialized and after a query fails
+    rather than on every borrow.
+    """
+    with _db_pool_lock:
+        if _db_pool is not None and _db_pool_file != _database_file_id(_db_pool.database):
+            logger.info(f"Database file {_db_pool.database} was replaced, reopening connections")
+            _open_pools(_db_pool.database)
+
+def _get_db_pool() -> SQLitePool:
+    """Get the connection pool for the configured database"""
+    pool = _db_pool
+    if pool is not None and pool.database == get_settings().database_path:
+        return pool
+    with _db_pool_lock:
+        database_path = get_settings().database_path
+        if _db_pool is None or _db_pool.database != database_path:
+            _open_pools(database_path)
+        return _db_pool
+
+def _get_reader_pool() -> SQLitePool:
+    """Get the read-only connection pool for the configured database"""
+    _get_db_pool()
+    return _reader_pool
+
 @contextmanager
-def get_db_connection():
-    """Get database connection with automatic cleanup"""
-    settings = get_settings()
-    conn = sqlite3.connect(settings.database_path)
-    conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
+def _borrow(pool: SQLitePool):
+    """Borrow a connection from pool, checking the file if anything fails"""
     try:
+        with pool.connection() as conn:
+            yield conn
+    except sqlite3.DatabaseError:
+        _reopen_if_replaced()
+        raise
+
+def invalidate_query_cache() -> None:
+    """Drop cached search results after the videos table changed
+    
+    Call it after the write has been committed.
+    """
+    global _data_version
+    with _query_cache_lock:
+        _data_version += 1
+
+@contextmanager
+def get_db_connection():
+    """Borrow a pooled database connection"""
+    with _borrow(_get_db_pool()) as conn:
+        yield conn
+
+@contextmanager
+def get_db_reader():
+    """Borrow a pooled read-only database connection"""
+    with _borrow(_get_reader_pool()) as conn:
         yield conn
-    finally:
-        conn.close()
 
 def insert_video(video: VideoMetadata) -> bool:
     """Insert or update video metadata in database"""
+    return insert_videos([video]) == 1
+
+def insert_videos(videos: List[VideoMetadata]) -> int:
+    """Insert or update a batch of videos in a single transaction
+    
+    Returns the number of videos written, which is 0 if the batch failed.
+    """
+    if not videos:
+        return 0
+    
+    params = [
+        (
+            video.video_id, video.title, video.description, video.channel_id,
+            video.channel_title, video.published_at, video.duration, video.thumbnail_url,
+            video.view_count, video.like_count, video.has_transcript, video.transcript_language
+        )
+        for video in videos
+    ]
+    
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Check if video exists
-            cursor.execute("SELECT video_id FROM videos WHERE video_id = ?", (video.video_id,))
-            exists = cursor.fetchone()
-            
-            if exists:
-                # Update existing video
-                cursor.execute("""
-                    UPDATE videos SET
-                        title = ?, description = ?, channel_id = ?, channel_title = ?,
-                        published_at = ?, duration = ?, thumbnail_url = ?, view_count = ?,
-                        like_count = ?, has_transcript = ?, transcript_language = ?,
-                        updated_at = ?
-                    WHERE video_id = ?
-                """, (
-                    video.title, video.description, video.channel_id, video.channel_title,
-                    video.published_at, video.duration, video.thumbnail_url, video.view_count,
-                    video.like_count, video.has_transcript, video.transcript_language,
-                    datetime.now().isoformat(), video.video_id
-                ))
-            else:
-                # Insert new video
-                cursor.execute("""
-                    INSERT INTO videos (
-                        video_id, title, description, channel_id, channel_title,
-                        published_at, duration, thumbnail_url, view_count, like_count,
-                        has_transcript, transcript_language, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    video.video_id, video.title, video.description, video.channel_id,
-                    video.channel_title, video.published_at, video.duration, video.thumbnail_url,
-                    video.view_count, video.like_count, video.has_transcript, video.transcript_language,
-                    datetime.now().isoformat(), datetime.now().isoformat()
-                ))
-            
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(_UPSERT_VIDEO_SQL, params)
             conn.commit()
-            return True
+        invalidate_query_cache()
+        return len(params)
             
     except Exception as e:
-        logger.error(f"Error inserting/updating video {video.video_id}: {e}")
-        return False
+        ids = ", ".join(video.video_id for video in videos[:5])
+        logger.error(f"Error inserting/updating {len(videos)} video(s) ({ids}): {e}")
+        return 0
 
 def get_videos_by_query(query: str, limit: int = 10) -> List[Dict[str, Any]]:
-    """Search videos by text query in title and description with SQL injection protection"""
+    """Search videos by text query through the full-text index
+    
+    Results come back ordered by relevance, best match first.
+    """
     try:
-        with get_db_connection() as conn:
-            return search_videos_safe(conn, query, limit)
+        pool = _get_reader_pool()
+        key = (" ".join(query.lower().split()), limit)
+        with _query_cache_lock:
+            cached = _query_cache.get(key)
+            if cached is not None and cached[0] == _data_version:
+                return [dict(video) for video in cached[1]]
+            version = _data_version
+        
+        with _borrow(pool) as conn:
+            videos = FullTextSearch(conn).search_videos(query, limit)
+        
+        with _query_cache_lock:
+            _query_cache[key] = (version, [dict(video) for video in videos])
+        return videos
     except Exception as e:
         logger.error(f"Error searching videos: {e}")
         return []
 
-def get_all_videos() -> List[Dict[str, Any]]:
-    """Get all videos from database"""
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM videos ORDER BY published_at DESC")
-            return [dict(row) for row in cursor.fetchall()]
-    except Exception as e:
-        logger.error(f"Error getting all videos: {e}")
-        return []
+def iter_all_videos(
+    columns: Optional[Sequence[str]] = VIDEO_SUMMARY_COLUMNS,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    batch_size: int = 500
+) -> Iterator[Dict[str, Any]]:
+    """Yield videos newest first, fetching rows from SQLite in batches
+    
+    Only ``columns`` are read; pass None for every column. The pooled
+    connection is held until the generator is exhausted or closed.
+    """
+    if columns is None:
+        select = "*"
+    else:
+        if not all(column.isidentifier() for column in columns):
+            raise ValueError(f"Invalid column list: {columns}")
+        select = ", ".join(columns)
+    
+    with get_db_reader() as conn:
+        cursor = conn.execute(
+            _ALL_VIDEOS_SQL.format(columns=select),
+            (-1 if limit is None else limit, offset)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+def count_videos() -> int:
+    """Number of videos in the library"""
+    with get_db_reader() as conn:
+        return conn.execute(_COUNT_VIDEOS_SQL).fetchone()[0]
+
+def video_exists(video_id: str) -> bool:
+    """Check whether a video is already in the library"""
+    with get_db_reader() as conn:
+        return conn.execute(_VIDEO_EXISTS_SQL, (video_id,)).fetchone() is not None
 
 def update_video_transcript_status(video_id: str, has_transcript: bool, language: str = None):
     """Update transcript status for a video"""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE videos SET 
-                    has_transcript = ?, 
-                    transcript_language = ?,
-                    updated_at = ?
-                WHERE video_id = ?
-            """, (has_transcript, language, datetime.now().isoformat(), video_id))
+            cursor.execute(_UPDATE_TRANSCRIPT_STATUS_SQL, (has_transcript, language, video_id))
             conn.commit()
-            return True
+        invalidate_query_cache()
+        return True
     except Exception as e:
         logger.error(f"Error updating transcript status for {video_id}: {e}")
         return False
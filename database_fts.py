@@ -1,12 +1,78 @@
 """Full-text search implementation using SQLite FTS5"""
 
+import re
 import sqlite3
 import logging
+from collections import Counter
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
+from database_search import STOP_WORDS, search_videos_safe
+
 logger = logging.getLogger(__name__)
 
+# Ranked FTS5 match joined back to the full video rows. Ranking by the
+# table's own rank column (configured per query through "rank MATCH") lets
+# FTS5 hand back the best rows in order and stop at the LIMIT, so snippets and
+# the join to videos only run for the returned hits instead of every match.
+_SEARCH_SQL = """
+    WITH hits AS (
+        SELECT 
+            video_id,
+            rank as bm25_score,
+            snippet(videos_fts, 1, '<mark>', '</mark>', '...', 20) as snippet
+        FROM videos_fts
+        WHERE videos_fts MATCH ? AND rank MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    )
+    SELECT v.*, h.snippet, h.bm25_score
+    FROM hits h
+    JOIN videos v ON v.video_id = h.video_id
+    ORDER BY h.bm25_score
+"""
+
+# Searchable FTS columns, in table order after video_id
+_FTS_FIELDS = ('title', 'description', 'channel_title', 'transcript')
+
+# Bitmask of the columns each hit matched in: highlight() only inserts the
+# marker into a column when a phrase instance lands there. {ids} is filled
+# with one placeholder per video id.
+_MATCHED_FIELDS_SQL = """
+    SELECT 
+        video_id,
+        coalesce(instr(highlight(videos_fts, 1, char(1), ''), char(1)) > 0, 0)
+        | (coalesce(instr(highlight(videos_fts, 2, char(1), ''), char(1)) > 0, 0) << 1)
+        | (coalesce(instr(highlight(videos_fts, 3, char(1), ''), char(1)) > 0, 0) << 2)
+        | (coalesce(instr(highlight(videos_fts, 4, char(1), ''), char(1)) > 0, 0) << 3)
+        AS field_mask
+    FROM videos_fts
+    WHERE videos_fts MATCH ? AND video_id IN ({ids})
+"""
+
+# Titles whose words start with a typed prefix, best matches first. Served
+# by video_titles_fts, an unstemmed copy of the title index with prefix
+# indexes, since the stems in videos_fts stop matching once a prefix runs
+# past them ("runn" never matches the stem "run").
+_SUGGEST_SQL = """
+    SELECT title FROM video_titles_fts
+    WHERE video_titles_fts MATCH ?
+    ORDER BY rank
+    LIMIT ?
+"""
+
+# Used when video_titles_fts is missing or cannot answer a prefix query
+_SUGGEST_LIKE_SQL = """
+    SELECT title FROM videos
+    WHERE title LIKE ?
+    LIMIT ?
+"""
+
+# Titles scanned per requested suggestion
+_SUGGEST_TITLES_PER_RESULT = 10
+
+_WORD_RE = re.compile(r"\w+")
+
 @dataclass
 class SearchResult:
     """Search result with relevance score"""
@@ -26,7 +92,7 @@ class FullTextSearch:
     def __init__(self, conn: sqlite3.Connection):
         self.conn = conn
         self.conn.row_factory = sqlite3.Row
-        self._check_fts_available()
+        self.fts_available = self._check_fts_available()
     
     def _check_fts_available(self) -> bool:
         """Check if FTS is available and properly set up"""
@@ -40,7 +106,11 @@ class FullTextSearch:
     def _get_field_weights(self) -> Dict[str, float]:
         """Get field weights for relevance scoring"""
         cursor = self.conn.cursor()
-        cursor.execute("SELECT key, value FROM fts_config WHERE key LIKE '%_weight'")
+        try:
+            cursor.execute("SELECT key, value FROM fts_config WHERE key LIKE '%_weight'")
+        except sqlite3.OperationalError:
+            # fts_config comes with migration 004; use the default weights until then
+            return {}
         weights = {}
         for row in cursor.fetchall():
             field = row['key'].replace('_weight', '')
@@ -64,13 +134,10 @@ class FullTextSearch:
         Returns:
             List of SearchResult objects ordered by relevance
         """
-        if not self._check_fts_available():
+        if not self.fts_available:
             logger.warning("FTS table not available, falling back to basic search")
             return self._fallback_search(query, limit)
         
-        cursor = self.conn.cursor()
-        weights = self._get_field_weights()
-        
         # Prepare the query for FTS
         fts_query = self._prepare_fts_query(query)
         
@@ -84,36 +151,14 @@ class FullTextSearch:
         else:
             search_expr = fts_query
         
-        # Perform the search with relevance scoring
-        sql = """
-            SELECT 
-                v.*,
-                fts.rank as fts_rank,
-                snippet(videos_fts, 1, '<mark>', '</mark>', '...', 20) as snippet,
-                bm25(videos_fts, ?, ?, ?, ?) as bm25_score
-            FROM videos_fts fts
-            JOIN videos v ON fts.video_id = v.video_id
-            WHERE videos_fts MATCH ?
-            ORDER BY bm25_score
-            LIMIT ?
-        """
-        
-        params = (
-            weights.get('title', 10.0),
-            weights.get('description', 5.0),
-            weights.get('channel', 3.0),
-            weights.get('transcript', 1.0),
-            search_expr,
-            limit
-        )
-        
         try:
-            cursor.execute(sql, params)
             results = []
+            rows = self._match_rows(search_expr, limit)
+            matched = self._get_matched_fields([row['video_id'] for row in rows], fts_query)
             
-            for row in cursor.fetchall():
+            for row in rows:
                 # Determine which fields matched
-                matched_fields = self._get_matched_fields(row['video_id'], fts_query)
+                matched_fields = matched.get(row['video_id'], [])
                 
                 result = SearchResult(
                     video_id=row['video_id'],
@@ -134,6 +179,52 @@ class FullTextSearch:
             logger.error(f"FTS search error: {e}")
             return self._fallback_search(query, limit)
     
+    def _match_rows(self, search_expr: str, limit: int) -> List[sqlite3.Row]:
+        """Run a ranked FTS match and return the joined video rows"""
+        weights = self._get_field_weights()
+        # One bm25() weight per column; video_id is column 0 and never matches
+        rank_expr = "bm25(0.0, {:f}, {:f}, {:f}, {:f})".format(
+            weights.get('title', 10.0),
+            weights.get('description', 5.0),
+            weights.get('channel', 3.0),
+            weights.get('transcript', 1.0)
+        )
+        cursor = self.conn.cursor()
+        cursor.execute(_SEARCH_SQL, (search_expr, rank_expr, limit))
+        return cursor.fetchall()
+    
+    def search_videos(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Search videos through the FTS index, best match first
+        
+        Returns full video rows with a positive BM25 ``score`` and a title
+        ``snippet``. Falls back to the LIKE-based search when the FTS table
+        is missing or the match fails.
+        """
+        if not query or not query.strip():
+            return []
+        
+        if not self.fts_available:
+            logger.warning("FTS table not available, falling back to basic search")
+            return search_videos_safe(self.conn, query, limit)
+        
+        fts_query = self._prepare_fts_query(query)
+        if fts_query == '""':
+            return []
+        
+        try:
+            rows = self._match_rows(fts_query, limit)
+        except sqlite3.OperationalError as e:
+            logger.error(f"FTS search error: {e}")
+            return search_videos_safe(self.conn, query, limit)
+        
+        videos = []
+        for row in rows:
+            video = dict(row)
+            video['score'] = abs(video.pop('bm25_score'))  # BM25 returns negative scores
+            videos.append(video)
+        return videos
+    
     def _prepare_fts_query(self, query: str) -> str:
         """Prepare query for FTS5 syntax"""
         # Remove special characters that might break FTS
@@ -147,37 +238,35 @@ class FullTextSearch:
         if not words:
             return '""'
         
-        # For multi-word queries, search for the phrase and individual words
+        # For multi-word queries, search for the phrase and individual words;
+        # stop words only count as part of the phrase
         if len(words) > 1:
             phrase = f'"{" ".join(words)}"'
-            individual = ' OR '.join(f'"{word}"' for word in words)
+            terms = [word for word in words if word.lower() not in STOP_WORDS] or words
+            individual = ' OR '.join(f'"{word}"' for word in terms)
             return f'({phrase} OR {individual})'
         else:
             return f'"{words[0]}"'
     
-    def _get_matched_fields(self, video_id: str, query: str) -> List[str]:
-        """Determine which fields matched the search query"""
-        cursor = self.conn.cursor()
-        matched = []
+    def _get_matched_fields(self, video_ids: List[str], query: str) -> Dict[str, List[str]]:
+        """Determine which fields matched the search query for each video"""
+        if not video_ids:
+            return {}
         
-        # Check each field individually
-        fields = ['title', 'description', 'channel_title', 'transcript']
-        for field in fields:
-            sql = f"""
-                SELECT 1 FROM videos_fts 
-                WHERE video_id = ? AND {field} MATCH ?
-                LIMIT 1
-            """
-            cursor.execute(sql, (video_id, query))
-            if cursor.fetchone():
-                matched.append(field)
+        sql = _MATCHED_FIELDS_SQL.format(ids=", ".join("?" * len(video_ids)))
+        cursor = self.conn.cursor()
+        cursor.execute(sql, (query, *video_ids))
         
-        return matched
+        return {
+            row['video_id']: [
+                field for bit, field in enumerate(_FTS_FIELDS)
+                if row['field_mask'] >> bit & 1
+            ]
+            for row in cursor.fetchall()
+        }
     
     def _fallback_search(self, query: str, limit: int) -> List[SearchResult]:
         """Fallback to LIKE-based search if FTS is not available"""
-        from database_search import search_videos_safe
-        
         results = search_videos_safe(self.conn, query, limit)
         search_results = []
         
@@ -200,6 +289,9 @@ class FullTextSearch:
         """
         Suggest search queries based on partial input
         
+        The last word is completed with words from video titles that start
+        with it, most frequent first; earlier words are kept as typed.
+        
         Args:
             partial_query: Partial search query
             limit: Maximum number of suggestions
@@ -207,33 +299,38 @@ class FullTextSearch:
         Returns:
             List of suggested queries
         """
-        if not partial_query or len(partial_query) < 2:
+        words = _WORD_RE.findall(partial_query.lower()) if partial_query else []
+        if not words or len(words[-1]) < 2:
             return []
         
-        cursor = self.conn.cursor()
-        
-        # Get unique words from titles that start with the partial query
-        sql = """
-            SELECT DISTINCT 
-                LOWER(SUBSTR(
-                    title, 
-                    INSTR(LOWER(title), LOWER(?)), 
-                    LENGTH(?)
-                )) as suggestion
-            FROM videos
-            WHERE LOWER(title) LIKE LOWER(?)
-            LIMIT ?
-        """
+        *head, last = words
+        titles = self._titles_with_prefix(last, limit * _SUGGEST_TITLES_PER_RESULT)
         
-        pattern = f"%{partial_query}%"
-        cursor.execute(sql, (partial_query, partial_query, pattern, limit))
+        # Only whole words that really start with what was typed count; the
+        # tokenizer also folds diacritics the typed prefix may not have
+        completion_re = re.compile(rf"\b{re.escape(last)}\w*")
+        counts = Counter(
+            word
+            for title in titles if title
+            for word in completion_re.findall(title.lower())
+        )
+        completions = sorted(counts, key=lambda word: (-counts[word], word))[:limit]
         
-        suggestions = []
-        for row in cursor.fetchall():
-            if row['suggestion']:
-                suggestions.append(row['suggestion'])
+        prefix = " ".join(head)
+        return [f"{prefix} {word}" if prefix else word for word in completions]
+    
+    def _titles_with_prefix(self, prefix: str, limit: int) -> List[str]:
+        """Fetch titles containing a word that starts with prefix"""
+        cursor = self.conn.cursor()
+        if self.fts_available:
+            try:
+                cursor.execute(_SUGGEST_SQL, (f'"{prefix}" *', limit))
+                return [row['title'] for row in cursor.fetchall()]
+            except sqlite3.OperationalError as e:
+                logger.error(f"FTS suggestion error: {e}")
         
-        return suggestions[:limit]
+        cursor.execute(_SUGGEST_LIKE_SQL, (f"%{prefix}%", limit))
+        return [row['title'] for row in cursor.fetchall()]
     
     def get_related_videos(self, video_id: str, limit: int = 5) -> List[SearchResult]:
         """
@@ -269,24 +366,13 @@ class FullTextSearch:
         return related[:limit]
 
 def create_fts_index(conn: sqlite3.Connection) -> None:
-    """Create or rebuild the FTS index"""
-    cursor = conn.cursor()
-    
-    # Clear existing FTS data
-    cursor.execute("DELETE FROM videos_fts")
-    
-    # Rebuild from videos and transcripts tables
-    cursor.execute("""
-        INSERT INTO videos_fts (video_id, title, description, channel_title, transcript)
-        SELECT 
-            v.video_id,
-            v.title,
-            v.description,
-            v.channel_title,
-            t.transcript_text
-        FROM videos v
-        LEFT JOIN transcripts t ON v.video_id = t.video_id
-    """)
+    """Rebuild the FTS indexes from the videos and transcripts tables
     
+    videos_fts and video_titles_fts keep no copy of the text, so FTS5's
+    'rebuild' re-reads it from their content tables. Run it after a VACUUM,
+    which may renumber the videos rowids the indexes are keyed on.
+    """
+    conn.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO video_titles_fts (video_titles_fts) VALUES ('rebuild')")
     conn.commit()
-    logger.info("FTS index rebuilt successfully")
\ No newline at end of file
+    logger.info("FTS index rebuilt successfully")
@@ -1,14 +1,15 @@
 """Safe database search functions with proper parameterization"""
 
+import re
 import sqlite3
 import logging
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, FrozenSet
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
 # Common stop words to filter out
-STOP_WORDS: Set[str] = {
+STOP_WORDS: FrozenSet[str] = frozenset({
     'i', 'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had',
     'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'to',
     'of', 'in', 'on', 'at', 'by', 'for', 'with', 'as', 'and', 'or', 'but', 'if', 'any',
@@ -21,17 +22,14 @@ STOP_WORDS: Set[str] = {
     'number', 'group', 'problem', 'fact', 'show', 'like', 'just', 'should', 'well', 'also',
     'one', 'two', 'three', 'really', 'actually', 'even', 'still', 'much', 'very', 'just',
     'done', 'made', 'got', 'put', 'let', 'run', 'set', 'good', 'best', 'better', 'true'
-}
+})
+
+# Words of 3+ characters; punctuation around them is skipped by the match
+_QUERY_WORD_RE = re.compile(r"\w{3,}")
 
 def clean_query_words(query: str) -> List[str]:
     """Extract meaningful words from query, filtering out stop words"""
-    words = query.lower().strip().split()
-    query_words = []
-    
-    for word in words:
-        # Only include words that are 3+ chars and not stop words
-        if len(word) >= 3 and word not in STOP_WORDS:
-            query_words.append(word)
+    query_words = [word for word in _QUERY_WORD_RE.findall(query.lower()) if word not in STOP_WORDS]
     
     # If all words were filtered out, use original query as phrase
     if not query_words and query.strip():
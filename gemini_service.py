@@ -1,14 +1,35 @@
 import logging
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 from config import get_settings
 from models import ConversationMessage
-from cost_tracking_service import CostTrackingService
+from cost_tracking_service import get_cost_tracker
 
 logger = logging.getLogger(__name__)
 
+EMPTY_RESPONSE_TEXT = "I apologize, but I couldn't generate a response."
+
+# Generic relevance reasons returned when Gemini fails or answers with no text
+RELEVANCE_FALLBACK_REASON = "This video may contain relevant information."
+EMPTY_RELEVANCE_REASON = "This video appears relevant to your query."
+RELEVANCE_FALLBACK_REASONS = frozenset((RELEVANCE_FALLBACK_REASON, EMPTY_RELEVANCE_REASON))
+
+def _fallback_intent() -> Dict[str, Any]:
+    """Intent used when Gemini fails or its answer can't be parsed
+    
+    Marked with 'fallback' so callers can tell it from a real analysis.
+    """
+    return {
+        'intent': 'conversational',
+        'entities': [],
+        'requires_context': True,
+        'follow_up': False,
+        'query_rewrite': '',
+        'fallback': True
+    }
+
 class GeminiService:
     """Service for interacting with Google's Gemini AI"""
     
@@ -17,7 +38,7 @@ class GeminiService:
         self.settings = get_settings()
         
         # Initialize cost tracking service
-        self.cost_tracker = CostTrackingService()
+        self.cost_tracker = get_cost_tracker()
         
         # Configure Gemini
         genai.configure(api_key=api_key)
@@ -59,43 +80,12 @@ class GeminiService:
             response = self.model.generate_content(full_prompt)
             
             # Extract response text
-            response_text = response.text if response.text else "I apologize, but I couldn't generate a response."
-            
-            # Get token usage from response metadata if available
-            prompt_tokens = 0
-            completion_tokens = 0
-            
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                prompt_tokens = getattr(response.usage_metadata, 'prompt_token_count', 0)
-                completion_tokens = getattr(response.usage_metadata, 'candidates_token_count', 0)
+            response_text = response.text if response.text else EMPTY_RESPONSE_TEXT
             
-            # Fallback to estimation if metadata not available
-            if prompt_tokens == 0 or completion_tokens == 0:
-                prompt_tokens = int(len(full_prompt.split()) * 1.3)  # Rough estimate
-                completion_tokens = int(len(response_text.split()) * 1.3)
-                logger.warning("Using estimated token counts - actual usage may differ")
-            
-            total_tokens = prompt_tokens + completion_tokens
-            
-            # Track usage with cost tracking service
-            usage_record = self.cost_tracker.track_usage(
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                model=self.settings.gemini_model,
-                conversation_id=conversation_id,
-                query_type=query_type
+            token_usage = self._track_response_usage(
+                full_prompt, response_text, response, conversation_id, query_type
             )
             
-            # Prepare token usage for response
-            token_usage = {
-                "prompt_tokens": prompt_tokens,
-                "completion_tokens": completion_tokens,
-                "total_tokens": total_tokens,
-                "cost_usd": usage_record.cost_usd
-            }
-            
-            logger.info(f"Generated response: {total_tokens} tokens, ${usage_record.cost_usd:.6f}")
-            
             return {
                 "response": response_text,
                 "token_usage": token_usage,
@@ -106,6 +96,90 @@ class GeminiService:
             logger.error(f"Error generating Gemini response: {e}")
             raise Exception(f"Failed to generate AI response: {str(e)}")
     
+    async def generate_response_stream(
+        self, 
+        prompt: str, 
+        conversation_history: List[ConversationMessage] = None,
+        conversation_id: Optional[str] = None,
+        query_type: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Generate AI response using Gemini, yielding text as it arrives
+        
+        Usage is tracked once the stream completes.
+        """
+        try:
+            # Build conversation context
+            full_prompt = self._build_conversation_prompt(prompt, conversation_history)
+            
+            response = await self.model.generate_content_async(full_prompt, stream=True)
+            
+            text_parts = []
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue  # A chunk without text parts, e.g. only finish metadata
+                if text:
+                    text_parts.append(text)
+                    yield text
+            
+            response_text = "".join(text_parts)
+            if not response_text:
+                response_text = EMPTY_RESPONSE_TEXT
+                yield response_text
+            
+            self._track_response_usage(
+                full_prompt, response_text, response, conversation_id, query_type
+            )
+            
+        except Exception as e:
+            logger.error(f"Error streaming Gemini response: {e}")
+            raise Exception(f"Failed to generate AI response: {str(e)}")
+    
+    def _track_response_usage(
+        self, 
+        full_prompt: str, 
+        response_text: str, 
+        response: Any,
+        conversation_id: Optional[str],
+        query_type: Optional[str]
+    ) -> Dict[str, Any]:
+        """Record the token usage and cost of a response"""
+        # Get token usage from response metadata if available
+        prompt_tokens = 0
+        completion_tokens = 0
+        
+        if hasattr(response, 'usage_metadata') and response.usage_metadata:
+            prompt_tokens = getattr(response.usage_metadata, 'prompt_token_count', 0)
+            completion_tokens = getattr(response.usage_metadata, 'candidates_token_count', 0)
+        
+        # Fallback to estimation if metadata not available
+        if prompt_tokens == 0 or completion_tokens == 0:
+            prompt_tokens = int(len(full_prompt.split()) * 1.3)  # Rough estimate
+            completion_tokens = int(len(response_text.split()) * 1.3)
+            logger.warning("Using estimated token counts - actual usage may differ")
+        
+        total_tokens = prompt_tokens + completion_tokens
+        
+        # Track usage with cost tracking service
+        usage_record = self.cost_tracker.track_usage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            model=self.settings.gemini_model,
+            conversation_id=conversation_id,
+            query_type=query_type
+        )
+        
+        logger.info(f"Generated response: {total_tokens} tokens, ${usage_record.cost_usd:.6f}")
+        
+        # Prepare token usage for response
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "cost_usd": usage_record.cost_usd
+        }
+    
     def _build_conversation_prompt(
         self, 
         current_message: str, 
@@ -255,23 +329,11 @@ Remember: You are working with the user's personal, curated video library. This
             except (json.JSONDecodeError, ValueError) as e:
                 logger.error(f"Error parsing intent analysis: {e}. Response: {response.text}")
                 # Fallback to simple intent detection
-                return {
-                    'intent': 'conversational',
-                    'entities': [],
-                    'requires_context': True,
-                    'follow_up': False,
-                    'query_rewrite': ''
-                }
+                return _fallback_intent()
             
         except Exception as e:
             logger.error(f"Error in analyze_query_intent: {e}")
-            return {
-                'intent': 'conversational',
-                'entities': [],
-                'requires_context': True,
-                'follow_up': False,
-                'query_rewrite': ''
-            }
+            return _fallback_intent()
     
     async def generate_video_relevance_reason(self, query: str, video_title: str, video_description: str = "") -> str:
         """Generate explanation for why a video is relevant to the query"""
@@ -284,7 +346,8 @@ Video Description: "{video_description[:200]}..."
 
 Provide a brief, helpful explanation of the relevance:"""
 
-            response = self.model.generate_content(relevance_prompt)
+            # Async call so the reasons gathered for a result list overlap
+            response = await self.model.generate_content_async(relevance_prompt)
             
             # Track cost for relevance generation
             if hasattr(response, 'usage_metadata') and response.usage_metadata:
@@ -304,11 +367,11 @@ Provide a brief, helpful explanation of the relevance:"""
                 total_tokens=total_tokens
             )
             
-            return response.text.strip() if response.text else "This video appears relevant to your query."
+            return response.text.strip() if response.text else EMPTY_RELEVANCE_REASON
             
         except Exception as e:
             logger.warning(f"Error generating relevance reason: {e}")
-            return "This video may contain relevant information."
+            return RELEVANCE_FALLBACK_REASON
     
     async def extract_citations_from_transcript(
         self, 
@@ -1,16 +1,19 @@
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import FastAPI, HTTPException, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Callable, Awaitable
+import asyncio
+import json
 import os
 import logging
 import time
 
 from config import get_settings, clear_settings_cache
-from database import init_database, get_db_connection
+from database import init_database, get_db_connection, VIDEO_PAGE_SIZE, MAX_VIDEO_PAGE_SIZE
 from youtube_service import YouTubeService
 from gemini_service import GeminiService
 from chat_handler import ChatHandler
@@ -26,7 +29,7 @@ from auth import (
     login, register, logout, refresh,
     get_current_user, get_current_active_user, get_admin_user
 )
-from security import encrypt_value, decrypt_value
+from security import encrypt_value, decrypt_value, calibrate_password_hashing
 from middleware import (
     ErrorHandlerMiddleware, LoggingMiddleware, 
     AuthenticationMiddleware, RateLimitMiddleware
@@ -100,6 +103,10 @@ async def startup_event():
     from database import run_migrations
     run_migrations()
     
+    # Size the password hashing cost for this machine
+    rounds = await asyncio.to_thread(calibrate_password_hashing)
+    logger.info(f"Password hashing calibrated to {rounds} bcrypt rounds")
+    
     # Initialize services if configured
     init_services()
     logger.info("Services initialized successfully")
@@ -267,12 +274,16 @@ async def remove_video(
         raise HTTPException(status_code=500, detail=f"Failed to remove video: {str(e)}")
 
 @app.get("/api/videos")
-async def get_all_videos(current_user: Dict[str, Any] = Depends(get_current_active_user)):
-    """Get all videos in the library"""
+async def list_videos(
+    limit: int = Query(VIDEO_PAGE_SIZE, ge=1, le=MAX_VIDEO_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """List the videos in the library, newest first, one page at a time"""
     try:
-        from database import get_all_videos
-        videos = get_all_videos()
-        return {"videos": videos}
+        from database import iter_all_videos, count_videos
+        videos = list(iter_all_videos(limit=limit, offset=offset))
+        return {"videos": videos, "total": count_videos(), "limit": limit, "offset": offset}
     except Exception as e:
         logger.error(f"Error getting videos: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get videos: {str(e)}")
@@ -556,6 +567,31 @@ async def send_chat_message(
         logger.error(f"Error processing chat message: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process message: {str(e)}")
 
+@app.post("/api/chat/message/stream")
+async def stream_chat_message(
+    message: ChatMessage,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Process a chat message and stream the AI response as it is generated
+    
+    The body is newline-delimited JSON: a "meta" event with the response
+    type, videos and citations, "delta" events carrying message text, then
+    an "end" event.
+    """
+    if not chat_handler:
+        raise HTTPException(status_code=400, detail="Chat service not configured")
+    
+    logger.info(f"Streaming chat message: {message.message[:50]}...")
+    
+    async def events():
+        async for event, payload in chat_handler.process_message_stream(
+            message.message, 
+            message.conversation_history
+        ):
+            yield json.dumps({"event": event, "data": jsonable_encoder(payload)}) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @app.post("/api/chat/export")
 async def export_conversation(
     export_request: ExportRequest,
@@ -108,7 +108,7 @@ def up(conn):
         END
     """)
     
-    # Populate FTS table with existing data
+    # Populate FTS table with existing data init_database has not indexed yet
     cursor.execute("""
         INSERT OR REPLACE INTO videos_fts (video_id, title, description, channel_title, transcript)
         SELECT 
@@ -119,6 +119,7 @@ def up(conn):
             t.transcript_text
         FROM videos v
         LEFT JOIN transcripts t ON v.video_id = t.video_id
+        WHERE v.video_id NOT IN (SELECT video_id FROM videos_fts)
     """)
     
     # Create a rank configuration table for search relevance tuning
@@ -0,0 +1,32 @@
+"""Add a partial index for revoked sessions"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+def up(conn):
+    """Apply migration - index revoked sessions, drop redundant token index"""
+    cursor = conn.cursor()
+    logger.info("Applying migration 005_add_session_revoked_index...")
+
+    # token_hash is declared UNIQUE, so SQLite already maintains a unique
+    # index on it; the plain index from 002 is a second copy of the same keys
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_token_hash")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+
+    # Partial index over revoked sessions. No query ends up using it: session
+    # lookups and revocation both go through the token_hash unique index, and
+    # 010 drops it again
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_revoked ON sessions(token_hash) WHERE is_revoked = 1")
+
+    logger.info("Migration 005_add_session_revoked_index applied successfully.")
+    # conn.commit() handled by migration runner
+
+def down(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    logger.info("Rolling back migration 005_add_session_revoked_index...")
+
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_revoked")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_token_hash ON sessions(token_hash)")
+
+    logger.info("Migration 005_add_session_revoked_index rolled back successfully.")
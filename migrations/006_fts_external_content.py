@@ -0,0 +1,233 @@
+"""Turn videos_fts into an external-content FTS5 index over videos and transcripts"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Triggers that kept the old self-contained videos_fts in sync
+OLD_TRIGGERS = (
+    "videos_fts_insert",
+    "videos_fts_update",
+    "videos_fts_delete",
+    "transcripts_after_insert_fts_update",
+    "transcripts_after_update_fts_update",
+    "transcripts_after_delete_fts_update",
+)
+
+def _create_triggers(cursor):
+    """Keep the index in step with videos and transcripts
+
+    An external-content index does not store the text, so every change has
+    to remove the old tokens with a 'delete' command carrying the old values
+    before the new ones are added.
+    """
+    cursor.execute("""
+        CREATE TRIGGER videos_fts_insert
+        AFTER INSERT ON videos
+        BEGIN
+            INSERT INTO videos_fts (rowid, video_id, title, description, channel_title, transcript)
+            VALUES (
+                NEW.rowid, NEW.video_id, NEW.title, NEW.description, NEW.channel_title,
+                (SELECT transcript_text FROM transcripts WHERE video_id = NEW.video_id)
+            );
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER videos_fts_update
+        AFTER UPDATE OF title, description, channel_title ON videos
+        BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, video_id, title, description, channel_title, transcript)
+            VALUES (
+                'delete', OLD.rowid, OLD.video_id, OLD.title, OLD.description, OLD.channel_title,
+                (SELECT transcript_text FROM transcripts WHERE video_id = OLD.video_id)
+            );
+            INSERT INTO videos_fts (rowid, video_id, title, description, channel_title, transcript)
+            VALUES (
+                NEW.rowid, NEW.video_id, NEW.title, NEW.description, NEW.channel_title,
+                (SELECT transcript_text FROM transcripts WHERE video_id = NEW.video_id)
+            );
+        END
+    """)
+    # BEFORE so the transcript row is still there when a cascade would remove it
+    cursor.execute("""
+        CREATE TRIGGER videos_fts_delete
+        BEFORE DELETE ON videos
+        BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, video_id, title, description, channel_title, transcript)
+            VALUES (
+                'delete', OLD.rowid, OLD.video_id, OLD.title, OLD.description, OLD.channel_title,
+                (SELECT transcript_text FROM transcripts WHERE video_id = OLD.video_id)
+            );
+        END
+    """)
+
+    # Transcript changes re-index the owning video, if it is still there
+    cursor.execute("""
+        CREATE TRIGGER transcripts_after_insert_fts_update
+        AFTER INSERT ON transcripts
+        BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, video_id, title, description, channel_title, transcript)
+            SELECT 'delete', rowid, video_id, title, description, channel_title, NULL
+            FROM videos WHERE video_id = NEW.video_id;
+            INSERT INTO videos_fts (rowid, video_id, title, description, channel_title, transcript)
+            SELECT rowid, video_id, title, description, channel_title, NEW.transcript_text
+            FROM videos WHERE video_id = NEW.video_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER transcripts_after_update_fts_update
+        AFTER UPDATE OF transcript_text ON transcripts
+        BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, video_id, title, description, channel_title, transcript)
+            SELECT 'delete', rowid, video_id, title, description, channel_title, OLD.transcript_text
+            FROM videos WHERE video_id = OLD.video_id;
+            INSERT INTO videos_fts (rowid, video_id, title, description, channel_title, transcript)
+            SELECT rowid, video_id, title, description, channel_title, NEW.transcript_text
+            FROM videos WHERE video_id = NEW.video_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER transcripts_after_delete_fts_update
+        AFTER DELETE ON transcripts
+        BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, video_id, title, description, channel_title, transcript)
+            SELECT 'delete', rowid, video_id, title, description, channel_title, OLD.transcript_text
+            FROM videos WHERE video_id = OLD.video_id;
+            INSERT INTO videos_fts (rowid, video_id, title, description, channel_title, transcript)
+            SELECT rowid, video_id, title, description, channel_title, NULL
+            FROM videos WHERE video_id = OLD.video_id;
+        END
+    """)
+
+def _drop_fts(cursor):
+    """Remove the FTS table, its triggers and its content view"""
+    for trigger in OLD_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP TABLE IF EXISTS videos_fts")
+    cursor.execute("DROP VIEW IF EXISTS videos_fts_content")
+
+def up(conn):
+    """Apply migration - rebuild videos_fts without its own copy of the text"""
+    cursor = conn.cursor()
+    logger.info("Applying migration 006_fts_external_content...")
+
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    fts5_available = cursor.fetchone()
+    if not fts5_available or not fts5_available[0]:
+        logger.info("FTS5 not available, keeping the existing videos_fts table.")
+        return
+
+    # Normally created by 004; the content view below needs it either way
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transcripts (
+            video_id TEXT PRIMARY KEY,
+            transcript_text TEXT,
+            language TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (video_id) REFERENCES videos(video_id) ON DELETE CASCADE
+        )
+    """)
+
+    _drop_fts(cursor)
+
+    # FTS5 reads document text back through this view, keyed on the videos
+    # rowid. Rowids of a table without an INTEGER PRIMARY KEY can change on
+    # VACUUM, so run create_fts_index() (an FTS5 'rebuild') after one.
+    cursor.execute("""
+        CREATE VIEW videos_fts_content AS
+        SELECT
+            v.rowid AS rowid,
+            v.video_id,
+            v.title,
+            v.description,
+            v.channel_title,
+            t.transcript_text AS transcript
+        FROM videos v
+        LEFT JOIN transcripts t ON t.video_id = v.video_id
+    """)
+    cursor.execute("""
+        CREATE VIRTUAL TABLE videos_fts USING fts5(
+            video_id UNINDEXED,
+            title,
+            description,
+            channel_title,
+            transcript,
+            content='videos_fts_content',
+            content_rowid='rowid',
+            tokenize='porter unicode61'
+        )
+    """)
+    _create_triggers(cursor)
+
+    logger.info("Indexing existing videos...")
+    cursor.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+
+    logger.info("Migration 006_fts_external_content applied successfully.")
+    # conn.commit() handled by migration runner
+
+def down(conn):
+    """Rollback migration - go back to a videos_fts that stores its own text"""
+    cursor = conn.cursor()
+    logger.info("Rolling back migration 006_fts_external_content...")
+
+    _drop_fts(cursor)
+
+    cursor.execute("""
+        CREATE VIRTUAL TABLE videos_fts USING fts5(
+            video_id UNINDEXED,
+            title,
+            description,
+            channel_title,
+            transcript,
+            tokenize='porter unicode61'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER videos_fts_insert
+        AFTER INSERT ON videos
+        BEGIN
+            INSERT INTO videos_fts (video_id, title, description, channel_title, transcript)
+            VALUES (
+                NEW.video_id, NEW.title, NEW.description, NEW.channel_title,
+                (SELECT transcript_text FROM transcripts WHERE video_id = NEW.video_id)
+            );
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER videos_fts_update
+        AFTER UPDATE OF title, description, channel_title ON videos
+        BEGIN
+            UPDATE videos_fts
+            SET title = NEW.title, description = NEW.description, channel_title = NEW.channel_title
+            WHERE video_id = NEW.video_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER videos_fts_delete
+        AFTER DELETE ON videos
+        BEGIN
+            DELETE FROM videos_fts WHERE video_id = OLD.video_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER transcripts_after_insert_fts_update
+        AFTER INSERT ON transcripts
+        BEGIN
+            UPDATE videos_fts SET transcript = NEW.transcript_text WHERE video_id = NEW.video_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER transcripts_after_update_fts_update
+        AFTER UPDATE ON transcripts
+        BEGIN
+            UPDATE videos_fts SET transcript = NEW.transcript_text WHERE video_id = NEW.video_id;
+        END
+    """)
+    cursor.execute("""
+        INSERT INTO videos_fts (video_id, title, description, channel_title, transcript)
+        SELECT v.video_id, v.title, v.description, v.channel_title, t.transcript_text
+        FROM videos v
+        LEFT JOIN transcripts t ON v.video_id = t.video_id
+    """)
+
+    logger.info("Migration 006_fts_external_content rolled back successfully.")
@@ -0,0 +1,53 @@
+"""Add FTS5 prefix indexes to videos_fts for search-as-you-type"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _recreate_fts(cursor, prefix_option):
+    """Recreate the external-content videos_fts and re-index it
+
+    The triggers from 006 refer to videos_fts by name and keep working
+    against the new table.
+    """
+    cursor.execute("DROP TABLE IF EXISTS videos_fts")
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE videos_fts USING fts5(
+            video_id UNINDEXED,
+            title,
+            description,
+            channel_title,
+            transcript,
+            content='videos_fts_content',
+            content_rowid='rowid',
+            tokenize='porter unicode61'{prefix_option}
+        )
+    """)
+    cursor.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+
+def up(conn):
+    """Apply migration - index 2, 3 and 4 character prefixes"""
+    cursor = conn.cursor()
+    logger.info("Applying migration 007_fts_prefix_index...")
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name='videos_fts_content'")
+    if not cursor.fetchone():
+        logger.info("videos_fts is not an external-content index, skipping prefix indexes.")
+        return
+
+    # Short prefix queries ("py"*) then read one prefix index entry instead
+    # of merging the doclists of every term starting with those characters
+    _recreate_fts(cursor, ",\n            prefix='2 3 4'")
+
+    logger.info("Migration 007_fts_prefix_index applied successfully.")
+    # conn.commit() handled by migration runner
+
+def down(conn):
+    """Rollback migration - drop the prefix indexes"""
+    cursor = conn.cursor()
+    logger.info("Rolling back migration 007_fts_prefix_index...")
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name='videos_fts_content'")
+    if cursor.fetchone():
+        _recreate_fts(cursor, "")
+
+    logger.info("Migration 007_fts_prefix_index rolled back successfully.")
@@ -0,0 +1,37 @@
+"""Cover the paged video listing with a single published_at index"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+def up(conn):
+    """Apply migration - add the covering listing index, drop the ones it replaces"""
+    cursor = conn.cursor()
+    logger.info("Applying migration 008_video_listing_index...")
+
+    # Holds every column of database.VIDEO_SUMMARY_COLUMNS, so a listing page
+    # is read from the index alone without touching the table rows
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_videos_summary
+        ON videos(published_at DESC, video_id, title, channel_title, thumbnail_url, duration, has_transcript)
+    """)
+
+    # Every lookup or sort on published_at can use the index above, so the
+    # plain published_at indexes from 001/003 (and an earlier, narrower
+    # listing index) only cost extra work on each insert
+    cursor.execute("DROP INDEX IF EXISTS idx_videos_listing")
+    cursor.execute("DROP INDEX IF EXISTS idx_videos_published")
+    cursor.execute("DROP INDEX IF EXISTS idx_videos_published_at")
+
+    logger.info("Migration 008_video_listing_index applied successfully.")
+    # conn.commit() handled by migration runner
+
+def down(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    logger.info("Rolling back migration 008_video_listing_index...")
+
+    cursor.execute("DROP INDEX IF EXISTS idx_videos_summary")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_published ON videos(published_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos(published_at)")
+
+    logger.info("Migration 008_video_listing_index rolled back successfully.")
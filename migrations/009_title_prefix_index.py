@@ -0,0 +1,95 @@
+"""Serve title prefix lookups from an unstemmed FTS5 index"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+TITLE_TRIGGERS = ("video_titles_fts_insert", "video_titles_fts_update", "video_titles_fts_delete")
+
+def _create_videos_fts(cursor, prefix_option):
+    """Recreate the external-content videos_fts from 006/007 and re-index it"""
+    cursor.execute("DROP TABLE IF EXISTS videos_fts")
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE videos_fts USING fts5(
+            video_id UNINDEXED,
+            title,
+            description,
+            channel_title,
+            transcript,
+            content='videos_fts_content',
+            content_rowid='rowid',
+            tokenize='porter unicode61'{prefix_option}
+        )
+    """)
+    cursor.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+
+def up(conn):
+    """Apply migration - add video_titles_fts, drop the stemmed prefix indexes"""
+    cursor = conn.cursor()
+    logger.info("Applying migration 009_title_prefix_index...")
+
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    fts5_available = cursor.fetchone()
+    if not fts5_available or not fts5_available[0]:
+        logger.info("FTS5 not available, skipping the title prefix index.")
+        return
+
+    # videos_fts stores porter stems ("running" -> "run"), so a prefix that
+    # runs past the stem ("runn") matches nothing there. Titles are indexed
+    # again here as typed, reading the text straight from videos.
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS video_titles_fts USING fts5(
+            title,
+            content='videos',
+            content_rowid='rowid',
+            tokenize='unicode61',
+            prefix='2 3 4'
+        )
+    """)
+    for trigger in TITLE_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("""
+        CREATE TRIGGER video_titles_fts_insert
+        AFTER INSERT ON videos
+        BEGIN
+            INSERT INTO video_titles_fts (rowid, title) VALUES (NEW.rowid, NEW.title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER video_titles_fts_update
+        AFTER UPDATE OF title ON videos
+        BEGIN
+            INSERT INTO video_titles_fts (video_titles_fts, rowid, title) VALUES ('delete', OLD.rowid, OLD.title);
+            INSERT INTO video_titles_fts (rowid, title) VALUES (NEW.rowid, NEW.title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER video_titles_fts_delete
+        AFTER DELETE ON videos
+        BEGIN
+            INSERT INTO video_titles_fts (video_titles_fts, rowid, title) VALUES ('delete', OLD.rowid, OLD.title);
+        END
+    """)
+    cursor.execute("INSERT INTO video_titles_fts (video_titles_fts) VALUES ('rebuild')")
+
+    # The prefix indexes added to videos_fts by 007 no longer serve any query
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name='videos_fts_content'")
+    if cursor.fetchone():
+        _create_videos_fts(cursor, "")
+
+    logger.info("Migration 009_title_prefix_index applied successfully.")
+    # conn.commit() handled by migration runner
+
+def down(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    logger.info("Rolling back migration 009_title_prefix_index...")
+
+    for trigger in TITLE_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP TABLE IF EXISTS video_titles_fts")
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name='videos_fts_content'")
+    if cursor.fetchone():
+        _create_videos_fts(cursor, ",\n            prefix='2 3 4'")
+
+    logger.info("Migration 009_title_prefix_index rolled back successfully.")
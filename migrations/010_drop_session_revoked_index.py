@@ -0,0 +1,27 @@
+"""Drop the partial revoked-sessions index from 005"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+def up(conn):
+    """Apply migration - drop idx_sessions_revoked"""
+    cursor = conn.cursor()
+    logger.info("Applying migration 010_drop_session_revoked_index...")
+
+    # The session lookup reads is_revoked through a join on token_hash and
+    # revoking updates by token_hash alone; neither restricts is_revoked = 1,
+    # so the planner uses the UNIQUE token_hash index for both and the
+    # partial index was only extra work on every login
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_revoked")
+
+    logger.info("Migration 010_drop_session_revoked_index applied successfully.")
+    # conn.commit() handled by migration runner
+
+def down(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    logger.info("Rolling back migration 010_drop_session_revoked_index...")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_revoked ON sessions(token_hash) WHERE is_revoked = 1")
+
+    logger.info("Migration 010_drop_session_revoked_index rolled back successfully.")
@@ -2,6 +2,7 @@
 
 import os
 import base64
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from cryptography.fernet import Fernet
@@ -14,6 +15,10 @@ import secrets
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt cost factor bounds used by calibrate_password_hashing
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 16
+
 # JWT configuration
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
@@ -77,6 +82,25 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+def calibrate_password_hashing(target_seconds: float = 0.25) -> int:
+    """Raise the bcrypt cost factor until one hash takes at least target_seconds
+    
+    Each extra round doubles the work, so this walks up from the default and
+    stops at the first cost that meets the target on this machine. Existing
+    hashes keep verifying because bcrypt stores the cost in the hash itself.
+    """
+    bcrypt = pwd_context.handler("bcrypt")
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS:
+        start = time.perf_counter()
+        bcrypt.using(rounds=rounds).hash("calibration-password")
+        if time.perf_counter() - start >= target_seconds:
+            break
+        rounds += 1
+    
+    pwd_context.update(bcrypt__rounds=rounds)
+    return rounds
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -0,0 +1,126 @@
+"""Pool of long-lived sqlite3 connections"""
+
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Applied once to every connection when it is opened
+DEFAULT_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA foreign_keys=ON",
+)
+
+class SQLitePool:
+    """Thread-safe pool of sqlite3 connections that are opened once and reused
+
+    Connections are created lazily, up to ``max_size``, and configured with
+    ``pragmas`` when opened so the settings persist for their whole lifetime.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        max_size: int = 5,
+        pragmas: Iterable[str] = DEFAULT_PRAGMAS,
+        row_factory: Optional[Callable[..., Any]] = None,
+        timeout: float = 30.0,
+        **connect_kwargs
+    ):
+        self.database = database
+        self.max_size = max_size
+        self.pragmas = tuple(pragmas)
+        self.row_factory = row_factory
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(self.database, check_same_thread=False, **self.connect_kwargs)
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one while below max_size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Timed out waiting for a connection to {self.database}")
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Close a connection and free its slot"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """Borrow a connection for the duration of the block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            # Never hand a connection back with a half-finished transaction
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error as e:
+                logger.warning(f"Discarding broken connection to {self.database}: {e}")
+                self._discard(conn)
+            else:
+                if self._closed:
+                    self._discard(conn)
+                else:
+                    self._idle.put(conn)
+
+    def close_all(self) -> None:
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def close(self) -> None:
+        """Close idle connections now and borrowed ones as they are returned
+
+        For a pool that is being replaced; connections opened through it
+        afterwards are closed on return too.
+        """
+        self._closed = True
+        self.close_all()
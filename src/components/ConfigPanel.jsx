@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react'
 import PropTypes from 'prop-types'
 import { Save, X, Eye, EyeOff, ExternalLink, CheckCircle, AlertCircle } from 'lucide-react'
-import { updateConfiguration, checkConfiguration, getAllVideos } from '../services/api'
+import { updateConfiguration, checkConfiguration, getLibraryStats } from '../services/api'
 
 // Mask used to represent saved secrets
 const MASKED_VALUE = '••••••••••••••••'
@@ -42,14 +42,12 @@ const ConfigPanel = ({ onClose, onConfigured }) => {
 
   const loadLibraryStats = async () => {
     try {
-      const response = await getAllVideos()
-      const videos = response.videos || []
-      const videosWithTranscripts = videos.filter(v => v.has_transcript).length
+      const stats = await getLibraryStats()
 
       setLibraryStats({
-        totalVideos: videos.length,
-        videosWithTranscripts: videosWithTranscripts,
-        lastSync: videos.length > 0 ? Math.max(...videos.map(v => new Date(v.created_at || v.updated_at).getTime())) : null
+        totalVideos: stats.total_videos,
+        videosWithTranscripts: stats.videos_with_transcripts,
+        lastSync: stats.last_sync
       })
     } catch (error) {
       console.error('Failed to load library stats:', error)
@@ -1,9 +1,11 @@
 import React, { useState, useEffect } from 'react'
 import { Plus, Trash2, ExternalLink, Video, AlertCircle, CheckCircle, Loader } from 'lucide-react'
-import { addVideo, removeVideo, getAllVideos } from '../services/api'
+import { addVideo, removeVideo, getVideos } from '../services/api'
 
 const VideoLibrary = ({ onClose }) => {
   const [videos, setVideos] = useState([])
+  const [totalVideos, setTotalVideos] = useState(0)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [newVideoUrl, setNewVideoUrl] = useState('')
   const [isLoading, setIsLoading] = useState(false)
   const [isLoadingVideos, setIsLoadingVideos] = useState(true)
@@ -16,8 +18,9 @@ const VideoLibrary = ({ onClose }) => {
   const loadVideos = async () => {
     try {
       setIsLoadingVideos(true)
-      const response = await getAllVideos()
+      const response = await getVideos()
       setVideos(response.videos || [])
+      setTotalVideos(response.total || 0)
     } catch (error) {
       console.error('Failed to load videos:', error)
       setStatus({ type: 'error', message: 'Failed to load video library' })
@@ -26,6 +29,20 @@ const VideoLibrary = ({ onClose }) => {
     }
   }
 
+  const loadMoreVideos = async () => {
+    try {
+      setIsLoadingMore(true)
+      const response = await getVideos({ offset: videos.length })
+      setVideos(prev => [...prev, ...(response.videos || [])])
+      setTotalVideos(response.total || 0)
+    } catch (error) {
+      console.error('Failed to load more videos:', error)
+      setStatus({ type: 'error', message: 'Failed to load more videos' })
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
+
   const handleAddVideo = async (e) => {
     e.preventDefault()
     if (!newVideoUrl.trim()) return
@@ -157,7 +174,7 @@ const VideoLibrary = ({ onClose }) => {
 
         {/* Video Library */}
         <div className="library-section">
-          <h3>Your Video Collection ({videos.length} videos)</h3>
+          <h3>Your Video Collection ({totalVideos} videos)</h3>
           
           {isLoadingVideos ? (
             <div className="loading-state">
@@ -204,15 +221,6 @@ const VideoLibrary = ({ onClose }) => {
                         </span>
                       )}
                     </div>
-                    
-                    {video.description && (
-                      <p className="video-description">
-                        {video.description.length > 150 
-                          ? `${video.description.substring(0, 150)}...` 
-                          : video.description
-                        }
-                      </p>
-                    )}
                   </div>
                   
                   <div className="video-actions">
@@ -233,6 +241,15 @@ const VideoLibrary = ({ onClose }) => {
                   </div>
                 </div>
               ))}
+              {videos.length < totalVideos && (
+                <button
+                  className="btn-secondary"
+                  onClick={loadMoreVideos}
+                  disabled={isLoadingMore}
+                >
+                  {isLoadingMore ? 'Loading...' : `Load more (${totalVideos - videos.length} remaining)`}
+                </button>
+              )}
             </div>
           )}
         </div>
@@ -71,8 +71,8 @@ export const removeVideo = async (videoId) => {
   return response.data
 }
 
-export const getAllVideos = async () => {
-  const response = await api.get('/videos')
+export const getVideos = async ({ limit, offset = 0 } = {}) => {
+  const response = await api.get('/videos', { params: { limit, offset } })
   return response.data
 }
 
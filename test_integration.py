@@ -4,16 +4,20 @@ import pytest
 import asyncio
 import sqlite3
 import os
+import threading
 from datetime import datetime
 
 # Test imports
-from database import init_database, get_db_connection
+import database
+from database import init_database, get_db_connection, insert_videos, get_videos_by_query
 from database_migrations import run_migrations
 from auth import create_user, authenticate_user, UserCreate
 from security import encrypt_value, decrypt_value, get_password_hash, verify_password
 from database_search import search_videos_safe
 from database_fts import FullTextSearch
 from cache import CacheManager, VideoCache
+from cachetools import TTLCache
+from models import VideoMetadata
 
 class TestSecurity:
     """Test security features"""
@@ -148,6 +152,85 @@ class TestDatabase:
             results = fts.search("database SQL", limit=5)
             assert len(results) > 0
 
+class TestSuggestions:
+    """Test search-as-you-type suggestions"""
+    
+    def setup_method(self):
+        """Setup test database"""
+        self.test_db = "test_suggest.db"
+        os.environ["DATABASE_PATH"] = self.test_db
+        init_database()
+        run_migrations()
+        insert_videos([
+            VideoMetadata(video_id=f"s{i}", title=title, channel_id="c", channel_title="C", published_at="2024-01-01")
+            for i, title in enumerate([
+                "Running a Python Tutorial",
+                "Generators in Python explained",
+                "Happiness tips",
+            ])
+        ])
+    
+    def teardown_method(self):
+        """Cleanup test database"""
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+    
+    def test_prefix_past_word_stem(self):
+        """Prefixes longer than the stemmed form still complete"""
+        with get_db_connection() as conn:
+            fts = FullTextSearch(conn)
+            
+            assert fts.suggest_queries("ru") == ["running"]
+            assert fts.suggest_queries("runn") == ["running"]
+            assert fts.suggest_queries("tutoria") == ["tutorial"]
+            assert fts.suggest_queries("generat") == ["generators"]
+            assert fts.suggest_queries("learn happin") == ["learn happiness"]
+
+class TestQueryCache:
+    """Test caching of full-text search results"""
+    
+    def setup_method(self):
+        """Setup test database with a controllable cache clock"""
+        self.test_db = "test_query_cache.db"
+        os.environ["DATABASE_PATH"] = self.test_db
+        init_database()
+        run_migrations()
+        self.now = 0.0
+        self.saved_cache = database._query_cache
+        database._query_cache = TTLCache(maxsize=16, ttl=database.QUERY_CACHE_TTL, timer=lambda: self.now)
+    
+    def teardown_method(self):
+        """Cleanup test database"""
+        database._query_cache = self.saved_cache
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+    
+    @staticmethod
+    def _video(video_id, title):
+        return VideoMetadata(video_id=video_id, title=title, channel_id="c", channel_title="C", published_at="2024-01-01")
+    
+    def test_writes_invalidate_results(self):
+        """Results read before insert_videos aren't served after it"""
+        insert_videos([self._video("qc1", "Quokka Tutorial")])
+        assert len(get_videos_by_query("quokka")) == 1
+        insert_videos([self._video("qc2", "Quokka Generators")])
+        assert len(get_videos_by_query("quokka")) == 2
+    
+    def test_unseen_writes_expire(self):
+        """Writes the cache isn't told about show up once the entry expires"""
+        insert_videos([self._video("qc3", "Narwhal Tutorial")])
+        assert len(get_videos_by_query("narwhal")) == 1
+        with get_db_connection() as conn:
+            conn.execute("""
+                INSERT INTO videos (video_id, title, channel_id, channel_title, published_at)
+                VALUES ('qc4', 'Narwhal Decorators', 'c', 'C', '2024-01-02')
+            """)
+            conn.commit()
+        assert len(get_videos_by_query("narwhal")) == 1
+        
+        self.now += database.QUERY_CACHE_TTL + 1
+        assert len(get_videos_by_query("narwhal")) == 2
+
 class TestCaching:
     """Test caching functionality"""
     
@@ -173,6 +256,26 @@ class TestCaching:
         assert cleared == 2
         assert cache.get("other:key3") == "value3"
     
+    def test_writer_survives_unexpected_errors(self):
+        """A write that fails with a non-Redis error neither kills the writer nor hangs flush()"""
+        class BrokenRedis:
+            def pipeline(self, transaction=True):
+                raise ValueError("unexpected")
+        
+        cache = CacheManager(redis_url=None)
+        cache.redis_client = BrokenRedis()
+        cache._writer = threading.Thread(target=cache._write_loop, daemon=True)
+        cache._writer.start()
+        
+        for attempt in range(2):
+            cache.set(f"key{attempt}", attempt)
+            flusher = threading.Thread(target=cache.flush, daemon=True)
+            flusher.start()
+            flusher.join(5)
+            assert not flusher.is_alive()
+            assert cache._writer.is_alive()
+            assert cache.in_memory.get(cache._make_key(f"key{attempt}")) == attempt
+    
     def test_video_cache(self):
         """Test video-specific caching"""
         cache = VideoCache()
@@ -193,6 +296,57 @@ class TestCaching:
         cached_transcript = cache.get_transcript("test123")
         assert cached_transcript == transcript
 
+class TestBrowserDriverPool:
+    """Test the browser fetcher's driver pool"""
+    
+    def test_failed_driver_start_releases_waiters(self):
+        """Callers queued behind a failed Chrome start get None instead of hanging"""
+        from browser_transcript_fetcher import BrowserTranscriptFetcher
+        
+        fetcher = BrowserTranscriptFetcher(pool_size=2)
+        fetcher._create_driver = lambda: None
+        
+        results = asyncio.run(asyncio.wait_for(fetcher.fetch_many(['a', 'b', 'c', 'd']), 5))
+        assert results == [None, None, None, None]
+        assert fetcher._driver_count == 0 and fetcher._creating == 0
+    
+    def test_failed_driver_start_backs_off(self):
+        """A failed start is retried only once the back-off has elapsed"""
+        from browser_transcript_fetcher import BrowserTranscriptFetcher
+        
+        fetcher = BrowserTranscriptFetcher(pool_size=1)
+        attempts = []
+        fetcher._create_driver = lambda: attempts.append(1)
+        
+        assert asyncio.run(fetcher._acquire_driver()) is None
+        assert asyncio.run(fetcher._acquire_driver()) is None
+        assert len(attempts) == 1
+        assert fetcher.enabled
+        
+        fetcher._retry_at = 0.0
+        asyncio.run(fetcher._acquire_driver())
+        assert len(attempts) == 2
+    
+    def test_drivers_are_reused(self):
+        """A pool of one starts a single driver and shares it between fetches"""
+        from browser_transcript_fetcher import BrowserTranscriptFetcher
+        
+        fetcher = BrowserTranscriptFetcher(pool_size=1)
+        created = []
+        fetcher._create_driver = lambda: created.append(object()) or created[-1]
+        
+        async def acquire_twice():
+            first = await fetcher._acquire_driver()
+            waiter = asyncio.ensure_future(fetcher._acquire_driver())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            await fetcher._release_driver(first)
+            return first, await asyncio.wait_for(waiter, 5)
+        
+        first, second = asyncio.run(acquire_twice())
+        assert first is second
+        assert len(created) == 1
+
 class TestAsyncTranscriptFetching:
     """Test async transcript fetching"""
     
@@ -217,7 +371,10 @@ def run_tests():
         TestSecurity,
         TestAuthentication,
         TestDatabase,
+        TestSuggestions,
+        TestQueryCache,
         TestCaching,
+        TestBrowserDriverPool,
         TestAsyncTranscriptFetching
     ]
     
@@ -150,6 +150,9 @@ class TopicManager:
             )
             
             self.conn.commit()
+            
+            from database import invalidate_query_cache
+            invalidate_query_cache()
             return True
             
         except Exception as e:
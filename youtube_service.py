@@ -8,7 +8,7 @@ from youtube_transcript_api.formatters import TextFormatter
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, VideoUnavailable, CouldNotRetrieveTranscript
 
 from config import get_settings
-from database import get_db_connection, insert_video, update_video_transcript_status
+from database import get_db_connection, insert_video, insert_videos, update_video_transcript_status
 from models import VideoMetadata, VideoTranscript, TranscriptSegment
 from topic_service import TopicExtractor, TopicManager
 from simple_transcript_fetcher import SimpleTranscriptFetcher
@@ -68,9 +68,8 @@ class YouTubeService:
                 return result
 
             # Check if video already exists
-            from database import get_all_videos
-            existing_videos = get_all_videos()
-            if any(v['video_id'] == video_id for v in existing_videos):
+            from database import video_exists
+            if video_exists(video_id):
                 result["message"] = "Video already exists in your library"
                 result["video_id"] = video_id
                 return result
@@ -168,7 +167,7 @@ class YouTubeService:
     async def remove_video(self, video_id: str) -> Dict[str, Any]:
         """Remove a video from the library"""
         try:
-            from database import get_db_connection
+            from database import get_db_connection, invalidate_query_cache
 
             # Remove from database
             with get_db_connection() as conn:
@@ -176,6 +175,7 @@ class YouTubeService:
                 cursor.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
                 deleted_count = cursor.rowcount
                 conn.commit()
+            invalidate_query_cache()
 
             # Remove transcript file
             transcript_path = os.path.join(self.settings.transcripts_dir, f"{video_id}.txt")
@@ -242,10 +242,9 @@ class YouTubeService:
                 
                 response = request.execute()
                 
-                for item in response.get('items', []):
-                    video_metadata = self._parse_video_item(item)
-                    if insert_video(video_metadata):
-                        count += 1
+                count += insert_videos([
+                    self._parse_video_item(item) for item in response.get('items', [])
+                ])
                 
                 next_page_token = response.get('nextPageToken')
                 if not next_page_token or count >= self.settings.max_videos_per_sync:
@@ -302,10 +301,9 @@ class YouTubeService:
                     
                     videos_response = videos_request.execute()
                     
-                    for item in videos_response.get('items', []):
-                        video_metadata = self._parse_video_item(item)
-                        if insert_video(video_metadata):
-                            count += 1
+                    count += insert_videos([
+                        self._parse_video_item(item) for item in videos_response.get('items', [])
+                    ])
                 
                 next_page_token = playlist_response.get('nextPageToken')
                 if not next_page_token or count >= self.settings.max_videos_per_sync:
@@ -342,10 +340,12 @@ class YouTubeService:
         """Fetch transcripts for videos that don't have them"""
         logger.info("Fetching missing transcripts...")
         
-        from database import get_all_videos
+        from database import iter_all_videos
         
-        videos = get_all_videos()
-        videos_without_transcripts = [v for v in videos if not v['has_transcript']]
+        videos_without_transcripts = [
+            v for v in iter_all_videos(columns=("video_id", "title", "has_transcript"))
+            if not v['has_transcript']
+        ]
         
         count = 0
         for video in videos_without_transcripts:
@@ -479,7 +479,7 @@ class YouTubeService:
                     logger.debug(f"Browser automation not available: {browser_init_error}")
                     self.browser_fetcher = None
             
-            if self.browser_fetcher and self.browser_fetcher.driver:
+            if self.browser_fetcher and self.browser_fetcher.enabled:
                 transcript = await self.browser_fetcher.fetch_transcript(video_id)
                 if transcript:
                     logger.info(f"Strategy 6 SUCCESS: Fetched transcript using browser automation - {len(transcript.segments)} segments, {len(transcript.full_text)} characters")